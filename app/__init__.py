@@ -39,6 +39,7 @@ from flask import Flask
 from app.models import db
 from app.routes import register_blueprints
 from app.plugins.registry import register_decoders
+from app.utils.schema import ensure_schema
 
 def create_app():
     app = Flask(__name__)
@@ -47,6 +48,8 @@ def create_app():
 
 
     db.init_app(app)
+    with app.app_context():
+        ensure_schema(db)      # adds any new tables and columns to an existing database
 
     register_decoders()        # deferred plugin registration
     register_blueprints(app)  # modular API blueprint registration
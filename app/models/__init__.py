@@ -1 +1,4 @@
 from .external_feed import db, ExternalFeed
+from .frame_record import FrameRecord
+from .feed_storage import FeedStorage
+from .capture_run import CaptureRun
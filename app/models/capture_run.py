@@ -0,0 +1,40 @@
+from app.models.external_feed import db
+
+
+class CaptureRun(db.Model):
+    """
+    One capture attempt with its stage timings. Append-only; the retention
+    job trims it to the newest CAPTURE_RUN_HISTORY rows.
+    """
+    __tablename__ = 'capture_runs'
+    __table_args__ = (
+        db.Index('ix_capture_runs_started', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    feed_uuid = db.Column(db.String, nullable=False)
+    decoder_name = db.Column(db.String, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=False)
+    result = db.Column(db.String, nullable=False)  # stored, unchanged, failed, timeout
+    queue_wait_ms = db.Column(db.Float, nullable=True)
+    decode_ms = db.Column(db.Float, nullable=True)
+    encode_ms = db.Column(db.Float, nullable=True)
+    write_ms = db.Column(db.Float, nullable=True)   # history/latest files and renditions
+    total_ms = db.Column(db.Float, nullable=True)   # all stages up to the commit
+    bytes = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.String, nullable=True)
+
+    def to_dict(self):
+        return {
+            "feed_uuid": self.feed_uuid,
+            "decoder_name": self.decoder_name,
+            "started_at": self.started_at.isoformat(),
+            "result": self.result,
+            "queue_wait_ms": self.queue_wait_ms,
+            "decode_ms": self.decode_ms,
+            "encode_ms": self.encode_ms,
+            "write_ms": self.write_ms,
+            "total_ms": self.total_ms,
+            "bytes": self.bytes,
+            "error": self.error
+        }
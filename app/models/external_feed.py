@@ -26,12 +26,33 @@ class ExternalFeed(db.Model):
     capture_at_times = db.Column(db.JSON, nullable=True)
     dispatch_mode = db.Column(db.String, default='interval')
     is_capturing = db.Column(db.Boolean, default=False)
+    # Set with is_capturing by the dispatcher; past it the capture is presumed dead.
+    capture_lease_until = db.Column(db.DateTime, nullable=True)
 
     gps_latitude = db.Column(db.Float, nullable=True)
     gps_longitude = db.Column(db.Float, nullable=True)
     gps_img_direction = db.Column(db.Float, nullable=True)
     gps_img_direction_ref = db.Column(db.String, nullable=True)  # Always 'T'
 
+    # Deduplication: identical (tolerance 0) or near-identical (perceptual
+    # hash within `dedup_tolerance` bits) frames are stored once and hardlinked.
+    dedup_enabled = db.Column(db.Boolean, default=False)
+    dedup_tolerance = db.Column(db.Integer, default=0)
+
+    # Change gating: frames whose mean grayscale difference from the last
+    # stored frame is below `change_threshold` (0-255) are not stored, except
+    # for a keyframe every `keyframe_minutes`. Null/0 threshold disables it.
+    change_threshold = db.Column(db.Float, nullable=True)
+    keyframe_minutes = db.Column(db.Integer, nullable=True)
+
+    # dispatch_mode "adaptive": the dispatcher uses adaptive_seconds, which
+    # capture_frame tunes from the change score within the min/max bounds.
+    failure_count = db.Column(db.Integer, default=0)
+    adaptive_seconds = db.Column(db.Float, nullable=True)
+    adaptive_min_seconds = db.Column(db.Integer, nullable=True)
+    adaptive_max_seconds = db.Column(db.Integer, nullable=True)
+    last_change_score = db.Column(db.Float, nullable=True)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -51,8 +72,18 @@ class ExternalFeed(db.Model):
             "capture_at_times": self.capture_at_times,
             "dispatch_mode": self.dispatch_mode,
             "is_capturing": self.is_capturing,
+            "capture_lease_until": self.capture_lease_until.isoformat() if self.capture_lease_until else None,
             "gps_latitude": self.gps_latitude,
             "gps_longitude": self.gps_longitude,
             "gps_img_direction": self.gps_img_direction,
-            "gps_img_direction_ref": self.gps_img_direction_ref
+            "gps_img_direction_ref": self.gps_img_direction_ref,
+            "dedup_enabled": bool(self.dedup_enabled),
+            "dedup_tolerance": self.dedup_tolerance or 0,
+            "change_threshold": self.change_threshold,
+            "keyframe_minutes": self.keyframe_minutes,
+            "failure_count": self.failure_count or 0,
+            "adaptive_seconds": self.adaptive_seconds,
+            "adaptive_min_seconds": self.adaptive_min_seconds,
+            "adaptive_max_seconds": self.adaptive_max_seconds,
+            "last_change_score": self.last_change_score
         }
\ No newline at end of file
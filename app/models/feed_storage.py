@@ -0,0 +1,26 @@
+from app.models.external_feed import db
+
+
+class FeedStorage(db.Model):
+    """
+    Running file/byte totals per feed directory under static/. Captures and
+    pruning adjust them as they go; the storage reconcile job re-measures
+    them from disk. Files that don't belong to a feed are kept under
+    STATIC_KEY.
+    """
+    __tablename__ = 'feed_storage'
+
+    STATIC_KEY = '_static'
+
+    feed_uuid = db.Column(db.String, primary_key=True)
+    file_count = db.Column(db.Integer, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    reconciled_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "feed_uuid": self.feed_uuid,
+            "file_count": self.file_count,
+            "total_bytes": self.total_bytes,
+            "reconciled_at": self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
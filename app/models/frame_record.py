@@ -0,0 +1,28 @@
+from app.models.external_feed import db
+
+
+class FrameRecord(db.Model):
+    """One stored history still, so readers never have to list the stills directory."""
+    __tablename__ = 'frame_records'
+    __table_args__ = (
+        db.Index('ix_frame_records_feed_time', 'feed_uuid', 'captured_at'),
+        db.UniqueConstraint('feed_uuid', 'filename', name='uq_frame_records_feed_file'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    feed_uuid = db.Column(db.String, nullable=False)
+    captured_at = db.Column(db.DateTime, nullable=False)
+    filename = db.Column(db.String, nullable=False)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    # Set for feeds with dedup enabled; hashes of the stored content, which a
+    # deduplicated record shares with the record it links to.
+    content_hash = db.Column(db.String, nullable=True)
+    perceptual_hash = db.Column(db.String, nullable=True)
+
+    def to_dict(self):
+        return {
+            "feed_uuid": self.feed_uuid,
+            "captured_at": self.captured_at.isoformat(),
+            "filename": self.filename,
+            "size": self.size
+        }
@@ -1,12 +1,14 @@
 import os
 import json
 import re
-import requests
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 from dotenv import load_dotenv
 from app.plugins.interface import DecoderInterface
+from app.utils import http_client
+
+ISS_POSITION_URL = os.getenv("ISS_POSITION_URL", "http://api.open-notify.org/iss-now.json")
 
 FONT_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -31,9 +33,7 @@ class ISSDecoder(DecoderInterface):
 
         # Get ISS location
         try:
-            resp = requests.get("http://api.open-notify.org/iss-now.json", timeout=5)
-            resp.raise_for_status()
-            data = resp.json()
+            data = http_client.get(ISS_POSITION_URL, timeout=5).json()
             lat = float(data["iss_position"]["latitude"])
             lon = float(data["iss_position"]["longitude"])
         except Exception as e:
@@ -46,7 +46,7 @@ class ISSDecoder(DecoderInterface):
         maptype = config.get("map_style", "roadmap")
 
         map_url = (
-            "https://maps.googleapis.com/maps/api/staticmap"
+            f"{http_client.GOOGLE_MAPS_API_BASE}/staticmap"
             f"?center={center_lat},{center_lon}"
             f"&zoom={zoom}"
             f"&size={size}"
@@ -55,8 +55,7 @@ class ISSDecoder(DecoderInterface):
         )
 
         try:
-            map_resp = requests.get(map_url, timeout=10)
-            map_resp.raise_for_status()
+            map_resp = http_client.get(map_url, timeout=10)
             map_img = Image.open(BytesIO(map_resp.content)).convert("RGB")
         except Exception as e:
             raise RuntimeError(f"Google Maps image fetch failed: {e}")
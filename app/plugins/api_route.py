@@ -1,7 +1,7 @@
 # app/plugins/api_route.py
 
 from app.plugins.interface import DecoderInterface
-import requests
+from app.utils import http_client
 import numpy as np
 import cv2
 import os
@@ -93,7 +93,7 @@ class API_Route_Decoder(DecoderInterface):
         if not api_key:
             raise RuntimeError("GOOGLE_MAPS_API_KEY not set")
 
-        directions_url = "https://maps.googleapis.com/maps/api/directions/json"
+        directions_url = f"{http_client.GOOGLE_MAPS_API_BASE}/directions/json"
         params = {
             "origin": origin,
             "destination": destination,
@@ -101,8 +101,7 @@ class API_Route_Decoder(DecoderInterface):
             "traffic_model": "best_guess",
             "key": api_key,
         }
-        res = requests.get(directions_url, params=params)
-        res.raise_for_status()
+        res = http_client.get(directions_url, params=params)
         API_Route_Decoder._increment_api_tally()
 
         data = res.json()
@@ -132,7 +131,7 @@ class API_Route_Decoder(DecoderInterface):
             img = Image.open(cache_path).convert("RGB")
         else:
             static_map_url = (
-                f"https://maps.googleapis.com/maps/api/staticmap"
+                f"{http_client.GOOGLE_MAPS_API_BASE}/staticmap"
                 f"?size={API_Route_Decoder.IMAGE_WIDTH}x{API_Route_Decoder.IMAGE_HEIGHT}"
                 f"&maptype={API_Route_Decoder.MAP_TYPE}"
                 f"&path=color:{path_color}|weight:5|enc:{overview_polyline}"
@@ -140,8 +139,7 @@ class API_Route_Decoder(DecoderInterface):
                 f"&markers=color:red%7Clabel:B%7C{destination}"
                 f"&key={api_key}"
             )
-            map_res = requests.get(static_map_url)
-            map_res.raise_for_status()
+            map_res = http_client.get(static_map_url)
             API_Route_Decoder._increment_api_tally()
 
             img = Image.open(BytesIO(map_res.content)).convert("RGB")
@@ -1,17 +1,22 @@
 from app.plugins.interface import DecoderInterface
+from app.plugins.sessions import VideoCaptureSession, read_video_frame
 import cv2
 import numpy as np
 
 class BasicDecoder(DecoderInterface):
     decoder_name = "basic"
+    supports_sessions = True
+    decode_timeout = 30
 
     @staticmethod
     def decode(url: str) -> np.ndarray:
-        cap = cv2.VideoCapture(url)
-        ret, frame = cap.read()
-        cap.release()
-        if not ret:
+        frame = read_video_frame(url, BasicDecoder.decode_timeout)
+        if frame is None:
             raise RuntimeError("Failed to capture frame")
         return frame
 
+    @staticmethod
+    def open_session(url: str) -> VideoCaptureSession:
+        return VideoCaptureSession(url)
+
 
@@ -1,23 +1,66 @@
 # app/plugins/interface.py
 
+import os
 from abc import ABC, abstractmethod
 import numpy as np
 
+DECODE_TIMEOUT_SECONDS = float(os.getenv("DECODE_TIMEOUT_SECONDS", "30"))
+
+class DecoderSession(ABC):
+    """
+    A long-lived handle on a single source, owned by a worker's SessionPool.
+    Sessions keep the underlying connection open between captures so that
+    `read()` only has to hand back the most recent frame.
+    """
+
+    @abstractmethod
+    def read(self) -> np.ndarray:
+        """Return the latest frame. Raise if the session is no longer usable."""
+        pass
+
+    def close(self):
+        """Release any resources held by the session."""
+        pass
+
+
 class DecoderInterface(ABC):
     """
     Abstract base class for decoder plugins.
     Every decoder must define:
       - a string `decoder_name` (class-level or property)
       - a static method `decode(url: str) -> np.ndarray`
+
+    Decoders may also opt in to long-lived sessions by setting
+    `supports_sessions = True` and implementing `open_session(url)`.
+
+    Cheap decoders can set `batch_size` > 1 to let the dispatcher capture
+    up to that many of their feeds in one job (see capture_batch).
+
+    Every decode runs under a deadline of `decode_timeout` seconds. Decoders
+    that can block inside native code read through
+    sessions.read_video_frame, which runs only the cv2 calls in a child
+    process that is killed at the deadline.
     """
 
     decoder_name: str
+    supports_sessions: bool = False
+    batch_size: int = 1
+    decode_timeout: float = DECODE_TIMEOUT_SECONDS
 
     @staticmethod
     @abstractmethod
     def decode(url: str) -> np.ndarray:
         pass
 
+    @staticmethod
+    def open_session(url: str) -> DecoderSession:
+        """
+        Optional static method. Returns a DecoderSession that stays connected
+        to the source between captures. Only called when `supports_sessions`
+        is True and session mode is enabled for the worker.
+        """
+        raise NotImplementedError("This decoder does not support sessions.")
+
     @staticmethod
     def get_metadata(url: str) -> dict:
         """
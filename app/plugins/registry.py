@@ -1,10 +1,15 @@
 import os
 import importlib
 import inspect
+import threading
 from app.plugins.interface import DecoderInterface
 
 decoders = {}
 
+
+class DecodeTimeout(RuntimeError):
+    """A decoder did not return a frame within its decode_timeout."""
+
 def register_decoders():
     global decoders
     if decoders:  # already initialized, seems hacky way of doing this.#todo 
@@ -13,7 +18,7 @@ def register_decoders():
     plugin_dir = os.path.dirname(__file__)
     
     for fname in os.listdir(plugin_dir):
-        if fname.endswith('.py') and fname not in ('__init__.py', 'interface.py', 'registry.py'):
+        if fname.endswith('.py') and fname not in ('__init__.py', 'interface.py', 'registry.py', 'sessions.py'):
             mod_name = f'app.plugins.{fname[:-3]}'
             mod = importlib.import_module(mod_name)
 
@@ -27,4 +32,42 @@ def register_decoders():
                         print(f"[+] Registered decoder: {name}")
 
 def get_decoder_by_name(name):
-    return decoders.get(name)
\ No newline at end of file
+    return decoders.get(name)
+
+def _run_threaded(fn, timeout, name):
+    """
+    Run fn() in a daemon thread and wait up to `timeout` seconds. A thread
+    can't be killed, so a hung call is abandoned and the job moves on.
+    """
+    result = {}
+
+    def target():
+        try:
+            result["frame"] = fn()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, name=f"decode-{name}", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise DecodeTimeout(f"{name} decode exceeded {timeout:g}s")
+    if "error" in result:
+        raise result["error"]
+    return result.get("frame")
+
+
+def decode_frame(DecoderClass, url):
+    """
+    Capture a frame through the decoder, reusing a pooled session when the
+    worker runs in session mode and the decoder supports it. The call is
+    bounded by the decoder's decode_timeout; DecodeTimeout is raised past it.
+    """
+    from app.plugins.sessions import SESSIONS_ENABLED, session_pool
+
+    name = getattr(DecoderClass, "decoder_name", DecoderClass.__name__)
+    timeout = DecoderClass.decode_timeout
+
+    if SESSIONS_ENABLED and getattr(DecoderClass, "supports_sessions", False):
+        return _run_threaded(lambda: session_pool.read(DecoderClass, url), timeout, name)
+    return _run_threaded(lambda: DecoderClass.decode(url), timeout, name)
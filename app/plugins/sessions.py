@@ -0,0 +1,257 @@
+# app/plugins/sessions.py
+
+import os
+import time
+import multiprocessing
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from app.plugins.interface import DecoderSession
+from app.utils.logger import log_info, log_warning
+
+SESSIONS_ENABLED = os.getenv("DECODER_SESSIONS", "false").lower() == "true"
+SESSION_IDLE_SECONDS = int(os.getenv("DECODER_SESSION_IDLE_SECONDS", "300"))
+SESSION_MAX_OPEN = int(os.getenv("DECODER_SESSION_MAX_OPEN", "16"))
+CV2_OPEN_TIMEOUT_MS = int(os.getenv("CV2_OPEN_TIMEOUT_MS", "10000"))
+CV2_READ_TIMEOUT_MS = int(os.getenv("CV2_READ_TIMEOUT_MS", "10000"))
+# read_video_frame runs the cv2 open/read in a child process that is killed
+# at the deadline. With this off it reads in the calling thread.
+DECODER_PROCESS_ISOLATION = os.getenv("DECODER_PROCESS_ISOLATION", "true").lower() == "true"
+
+
+def open_video_capture(url):
+    """
+    cv2.VideoCapture with FFmpeg open/read timeouts, so a dead RTSP/HTTP
+    source fails instead of blocking forever. Falls back to a plain open on
+    OpenCV builds without the timeout properties.
+    """
+    open_prop = getattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC", None)
+    read_prop = getattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC", None)
+    if open_prop is None or read_prop is None:
+        return cv2.VideoCapture(url)
+    return cv2.VideoCapture(url, cv2.CAP_FFMPEG, [open_prop, CV2_OPEN_TIMEOUT_MS, read_prop, CV2_READ_TIMEOUT_MS])
+
+
+
+def _read_one_frame(url):
+    cap = open_video_capture(url)
+    try:
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    return frame if ret else None
+
+
+def _isolated_read(url, conn):
+    try:
+        conn.send((True, _read_one_frame(url)))
+    except Exception as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+_isolation_lock = threading.Lock()
+_isolation_ctx = None
+
+
+def _isolation_context():
+    """
+    Children come from a forkserver: a single-threaded process started once
+    with this module preloaded, so they start fast and never inherit the
+    worker's threads or the locks those threads hold.
+    """
+    global _isolation_ctx
+    with _isolation_lock:
+        if _isolation_ctx is None:
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload([__name__])
+            _isolation_ctx = ctx
+    return _isolation_ctx
+
+
+def read_video_frame(url, timeout):
+    """
+    Open `url`, read one frame and release it; None if no frame came back.
+    With DECODER_PROCESS_ISOLATION only these cv2 calls run in a child,
+    which is killed after `timeout` seconds. Resolve URLs and touch caches
+    in the caller, not here.
+    """
+    if not DECODER_PROCESS_ISOLATION:
+        return _read_one_frame(url)
+
+    from app.plugins.registry import DecodeTimeout
+
+    ctx = _isolation_context()
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_isolated_read, args=(url, child), daemon=True)
+    proc.start()
+    child.close()
+    try:
+        if not parent.poll(timeout):
+            raise DecodeTimeout(f"video read exceeded {timeout:g}s")
+        ok, value = parent.recv()
+    except EOFError:
+        raise RuntimeError("video reader process exited without a frame")
+    finally:
+        parent.close()
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+    if not ok:
+        raise RuntimeError(value)
+    return value
+
+class VideoCaptureSession(DecoderSession):
+    """
+    Keeps a cv2.VideoCapture open and drains it on a background thread so the
+    buffered frame is always the newest one. `read()` only retrieves (colour
+    converts) the last grabbed frame, which takes milliseconds.
+    """
+
+    FIRST_FRAME_TIMEOUT = 15
+    STALE_AFTER_SECONDS = 10
+
+    def __init__(self, url: str):
+        self.url = url
+        self._cap = open_video_capture(url)
+        if not self._cap.isOpened():
+            self._cap.release()
+            raise RuntimeError(f"Failed to open stream {url}")
+        self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._lock = threading.Lock()
+        self._first_frame = threading.Event()
+        self._last_grab = 0.0
+        self._broken = False
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        try:
+            while not self._closed:
+                with self._lock:
+                    ok = self._cap.grab()
+                if not ok:
+                    self._broken = True
+                    break
+                self._last_grab = time.monotonic()
+                self._first_frame.set()
+        finally:
+            self._first_frame.set()
+            with self._lock:
+                self._cap.release()
+
+    def read(self) -> np.ndarray:
+        if not self._first_frame.wait(self.FIRST_FRAME_TIMEOUT):
+            raise RuntimeError("Timed out waiting for first frame")
+        if self._broken or self._closed:
+            raise RuntimeError("Stream ended")
+        if time.monotonic() - self._last_grab > self.STALE_AFTER_SECONDS:
+            raise RuntimeError("Stream stalled")
+
+        with self._lock:
+            ret, frame = self._cap.retrieve()
+        if not ret or frame is None:
+            raise RuntimeError("Failed to capture frame")
+        return frame
+
+    def close(self):
+        # The drain thread releases the capture on its way out; a hung grab()
+        # must not block the worker that is closing the session.
+        self._closed = True
+
+
+class SessionPool:
+    """
+    Per-worker pool of open DecoderSessions keyed by (decoder, url).
+    Idle sessions are evicted after SESSION_IDLE_SECONDS, the least recently
+    used session is closed once SESSION_MAX_OPEN is reached, and a session that
+    fails a read is discarded and reopened once before the error is raised.
+    """
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS, max_open=SESSION_MAX_OPEN):
+        self.idle_seconds = idle_seconds
+        self.max_open = max_open
+        self._sessions = OrderedDict()  # key -> (session, last_used)
+        self._lock = threading.Lock()
+
+    def read(self, DecoderClass, url: str) -> np.ndarray:
+        key = (DecoderClass.decoder_name, url)
+        self.evict_idle()
+
+        session = self._checkout(DecoderClass, key, url)
+        try:
+            return session.read()
+        except Exception as e:
+            log_warning(f"[SESSION] Dropping broken session {key[0]} {url}: {e}")
+            self._discard(key)
+
+        session = self._checkout(DecoderClass, key, url)
+        try:
+            return session.read()
+        except Exception:
+            self._discard(key)
+            raise
+
+    def _checkout(self, DecoderClass, key, url):
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            if entry:
+                self._sessions[key] = (entry[0], time.monotonic())
+                return entry[0]
+
+        session = DecoderClass.open_session(url)
+        log_info(f"[SESSION] Opened {key[0]} session for {url}")
+
+        with self._lock:
+            # An abandoned decode may have opened a session for the same key
+            # while this one was opening; keep that one and close ours.
+            entry = self._sessions.pop(key, None)
+            closing = []
+            if entry:
+                closing.append((key, session, "duplicate"))
+                session = entry[0]
+            self._sessions[key] = (session, time.monotonic())
+            while len(self._sessions) > self.max_open:
+                old_key, (old_session, _) = self._sessions.popitem(last=False)
+                closing.append((old_key, old_session, "pool full"))
+        for old_key, old_session, reason in closing:
+            self._close(old_key, old_session, reason)
+        return session
+
+    def _discard(self, key):
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+        if entry:
+            self._close(key, entry[0], "broken")
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            stale = [(k, s) for k, (s, used) in self._sessions.items() if used < cutoff]
+            for k, _ in stale:
+                del self._sessions[k]
+        for k, s in stale:
+            self._close(k, s, "idle")
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._sessions.items())
+            self._sessions.clear()
+        for k, (s, _) in entries:
+            self._close(k, s, "shutdown")
+
+    @staticmethod
+    def _close(key, session, reason):
+        try:
+            session.close()
+        except Exception as e:
+            log_warning(f"[SESSION] Error closing {key[0]} session for {key[1]}: {e}")
+        log_info(f"[SESSION] Closed {key[0]} session for {key[1]} ({reason})")
+
+
+session_pool = SessionPool()
@@ -1,65 +1,201 @@
 # app/plugins/webpage_snapshot_basic.py
 
 from app.plugins.interface import DecoderInterface
+from app.utils.logger import log_info, log_warning
 import numpy as np
 import cv2
-import tempfile
 import os
+import atexit
+import threading
 from urllib.parse import urlparse
 from playwright.async_api import async_playwright
 import asyncio
+import concurrent.futures
 
-class WebpageSnapshotBasic(DecoderInterface):
-    decoder_name = "webpage_snapshot_basic"
+POOL_SIZE = int(os.getenv("WEBPAGE_POOL_SIZE", "2"))
+PAGE_MAX_USES = int(os.getenv("WEBPAGE_PAGE_MAX_USES", "50"))
+PAGE_MAX_HEAP_MB = int(os.getenv("WEBPAGE_PAGE_MAX_HEAP_MB", "256"))
+SNAPSHOT_TIMEOUT = 90
 
-    @staticmethod
-    def decode(url: str) -> np.ndarray:
-        """
-        Capture the viewport-sized snapshot of the given web page URL.
-        Returns the image as an OpenCV (numpy ndarray).
-        """
-        async def capture_page():
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
 
-                # Set a fixed viewport size
-                context = await browser.new_context(
-                    viewport={"width": 1920, "height": 1080}
-                )
+class _PooledPage:
+    def __init__(self, context, page, generation):
+        self.context = context
+        self.page = page
+        self.generation = generation
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    One headless Chromium per worker process, driven from a private event loop
+    thread. Up to `size` context+page pairs are handed out at a time; a page is
+    closed and replaced after `max_uses` snapshots, when its JS heap grows past
+    `max_heap_mb`, or after any error. The browser is relaunched if it dies.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=PAGE_MAX_USES, max_heap_mb=PAGE_MAX_HEAP_MB):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_heap_bytes = max_heap_mb * 1024 * 1024
+        self._loop = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._generation = 0
+        self._idle = []
+        self._slots = None
+
+    def snapshot(self, url: str) -> bytes:
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._snapshot(url), loop)
+        try:
+            return future.result(timeout=SNAPSHOT_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # Cancel the coroutine so its page slot is recycled now rather
+            # than after Playwright's own timeouts.
+            future.cancel()
+            raise
+
+    def close(self):
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout=10)
+        except Exception as e:
+            log_warning(f"[WEBPAGE] Browser shutdown failed: {e}")
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    async def _ensure_browser(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        if self._browser is not None and self._browser.is_connected():
+            return
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._generation += 1
+        self._idle = []
+        log_info(f"[WEBPAGE] Launched pooled Chromium (generation {self._generation})")
+
+    async def _acquire(self):
+        await self._ensure_browser()
+        await self._slots.acquire()
+        while self._idle:
+            slot = self._idle.pop()
+            if slot.generation == self._generation and not slot.page.is_closed():
+                return slot
+        try:
+            # Set a fixed viewport size
+            context = await self._browser.new_context(
+                viewport={"width": 1920, "height": 1080}
+            )
+            page = await context.new_page()
+        except BaseException:  # includes cancellation
+            self._slots.release()
+            raise
+        return _PooledPage(context, page, self._generation)
 
+    async def _release(self, slot, healthy):
+        try:
+            slot.uses += 1
+            recycle = not healthy or slot.uses >= self.max_uses or slot.generation != self._generation
+            if not recycle:
                 try:
-                    parsed = urlparse(url)
-                    domain = parsed.hostname or ""
-                    if domain:
-                        await context.add_cookies([{
-                            "name": "cookie_accepted",
-                            "value": "true",
-                            "domain": domain,
-                            "path": "/"
-                        }])
-                except Exception as e:
-                    print(f"[!] Cookie injection failed (harmless): {e}")
-
-                page = await context.new_page()
-                await page.goto(url, timeout=30000)
+                    heap = await slot.page.evaluate(
+                        "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+                    )
+                    recycle = heap > self.max_heap_bytes
+                except Exception:
+                    recycle = True
 
+            if recycle:
                 try:
-                    accept_button = page.locator('text=/.*Accept|Agree.*/i')
-                    if await accept_button.is_visible():
-                        await accept_button.click()
-                        await page.wait_for_timeout(1000)
-                except Exception as e:
-                    print(f"[!] Auto-accept click failed (harmless): {e}")
+                    await slot.context.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.append(slot)
+        finally:
+            self._slots.release()
 
-                # Capture only viewport (no full_page)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-                    tmp_path = tmpfile.name
-                await page.screenshot(path=tmp_path, full_page=False)
+    async def _snapshot(self, url):
+        slot = await self._acquire()
+        healthy = False
+        try:
+            context, page = slot.context, slot.page
 
-                await browser.close()
+            try:
+                parsed = urlparse(url)
+                domain = parsed.hostname or ""
+                if domain:
+                    await context.add_cookies([{
+                        "name": "cookie_accepted",
+                        "value": "true",
+                        "domain": domain,
+                        "path": "/"
+                    }])
+            except Exception as e:
+                print(f"[!] Cookie injection failed (harmless): {e}")
 
-                img = cv2.imread(tmp_path)
-                os.unlink(tmp_path)
-                return img
+            await page.goto(url, timeout=30000)
 
-        return asyncio.run(capture_page())
\ No newline at end of file
+            try:
+                accept_button = page.locator('text=/.*Accept|Agree.*/i')
+                if await accept_button.is_visible():
+                    await accept_button.click()
+                    await page.wait_for_timeout(1000)
+            except Exception as e:
+                print(f"[!] Auto-accept click failed (harmless): {e}")
+
+            # Capture only viewport (no full_page)
+            png = await page.screenshot(full_page=False)
+            healthy = True
+            return png
+        finally:
+            # Errors and cancellation (snapshot() timing out) leave healthy
+            # False, so the page is closed and its slot freed.
+            await self._release(slot, healthy)
+
+    async def _shutdown(self):
+        for slot in self._idle:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        self._idle = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
+
+
+class WebpageSnapshotBasic(DecoderInterface):
+    decoder_name = "webpage_snapshot_basic"
+    decode_timeout = SNAPSHOT_TIMEOUT + 10
+
+    @staticmethod
+    def decode(url: str) -> np.ndarray:
+        """
+        Capture the viewport-sized snapshot of the given web page URL.
+        Returns the image as an OpenCV (numpy ndarray).
+        """
+        png = browser_pool.snapshot(url)
+        img = cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise RuntimeError("Failed to decode page screenshot")
+        return img
@@ -1,32 +1,85 @@
 from app.plugins.interface import DecoderInterface
+from app.plugins.sessions import VideoCaptureSession, read_video_frame
+from app.utils.url_cache import ResolvedUrlCache
+import os
 import cv2
 import numpy as np
 import yt_dlp
 
 class YouTubeDecoder(DecoderInterface):
     decoder_name = "youtube"
+    supports_sessions = True
+    decode_timeout = 60  # includes yt-dlp resolving the stream URL
+
+    @staticmethod
+    def resolve_stream_url(url: str) -> str:
+        ydl_opts = {
+            'format': 'best[ext=mp4]/best',
+            'quiet': True,
+            'noplaylist': True
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info_dict = ydl.extract_info(url, download=False)
+            video_url = info_dict.get('url', None)
+            if not video_url:
+                raise RuntimeError("Failed to extract video stream URL")
+        return video_url
 
     @staticmethod
     def decode(url: str) -> np.ndarray:
         try:
-            ydl_opts = {
-                'format': 'best[ext=mp4]/best',
-                'quiet': True,
-                'noplaylist': True
-            }
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                video_url = info_dict.get('url', None)
-                if not video_url:
-                    raise RuntimeError("Failed to extract video stream URL")
-
-            cap = cv2.VideoCapture(video_url)
-            ret, frame = cap.read()
-            cap.release()
-
-            if not ret:
+            video_url = stream_url_cache.get(url)
+            frame = YouTubeDecoder._read_frame(video_url)
+            if frame is None:
+                # Cached URL may have been revoked early; resolve once more.
+                stream_url_cache.invalidate(url)
+                video_url = stream_url_cache.get(url)
+                frame = YouTubeDecoder._read_frame(video_url)
+
+            if frame is None:
+                stream_url_cache.invalidate(url)
                 raise RuntimeError("Failed to capture frame from YouTube stream")
             return frame
 
         except Exception as e:
             raise RuntimeError(f"YouTubeDecoder error: {e}")
+
+    @staticmethod
+    def _read_frame(video_url):
+        # Only the cv2 read is isolated; the URL cache and its refresh
+        # thread and lock stay in this process.
+        return read_video_frame(video_url, YouTubeDecoder.decode_timeout)
+
+    @staticmethod
+    def open_session(url: str) -> VideoCaptureSession:
+        try:
+            try:
+                return YouTubeSession(url, stream_url_cache.get(url))
+            except RuntimeError:
+                stream_url_cache.invalidate(url)
+                return YouTubeSession(url, stream_url_cache.get(url))
+        except Exception as e:
+            raise RuntimeError(f"YouTubeDecoder error: {e}")
+
+
+class YouTubeSession(VideoCaptureSession):
+    """Drops the cached stream URL when the stream dies so the reopen re-resolves."""
+
+    def __init__(self, watch_url: str, video_url: str):
+        self.watch_url = watch_url
+        super().__init__(video_url)
+
+    def read(self) -> np.ndarray:
+        try:
+            return super().read()
+        except Exception:
+            stream_url_cache.invalidate(self.watch_url)
+            raise
+
+
+stream_url_cache = ResolvedUrlCache(
+    "youtube",
+    YouTubeDecoder.resolve_stream_url,
+    default_ttl=int(os.getenv("YOUTUBE_URL_DEFAULT_TTL", "1800")),
+    refresh_margin=int(os.getenv("YOUTUBE_URL_REFRESH_MARGIN", "900")),
+)
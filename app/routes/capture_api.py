@@ -1,8 +1,12 @@
 # app/routes/capture_api.py
-from flask import Blueprint, jsonify, send_file, request
+from flask import Blueprint, Response, jsonify, request
 import os
-from glob import glob
+from datetime import datetime, timezone
 from app.utils.logger import log_info
+from app.models import ExternalFeed
+from app.utils import frame_index
+from app.utils.http_cache import record_etag, not_modified, send_frame, seconds_until_next_capture
+from app.utils.zip_stream import stream_zip
 #from app.tasks.capture import preview_capture_task
 
 bp = Blueprint("capture_api", __name__)
@@ -19,22 +23,25 @@ def preview_feed(uuid):
 
 @bp.route("/feeds/<uuid>/frames", methods=["GET"])
 def list_frames(uuid):
-    feed_dir = os.path.join(STILLS_DIR, uuid)
-    if not os.path.exists(feed_dir):
-        return jsonify({"count": 0}), 200
-
-    frames = glob(os.path.join(feed_dir, f"{uuid}_*.jpg"))
-    return jsonify({"count": len(frames)}), 200
+    return jsonify({"count": frame_index.frame_count(uuid)}), 200
 
 @bp.route("/feeds/<uuid>/frames/<int:index>", methods=["GET"])
 def get_frame(uuid, index):
-    feed_dir = os.path.join(STILLS_DIR, uuid)
-    frames = sorted(glob(os.path.join(feed_dir, f"{uuid}_*.jpg")))
-
-    if index < 0 or index >= len(frames):
+    record = frame_index.get_frame(uuid, index, newest_first=False)
+    if not record:
         return jsonify({"error": "Frame not found."}), 404
 
-    return send_file(frames[index], mimetype="image/jpeg")
+    feed = ExternalFeed.query.filter_by(uuid=uuid).first()
+    etag = record_etag(record)
+    max_age = seconds_until_next_capture(feed)
+    cached = not_modified(etag, record.captured_at, max_age)
+    if cached:
+        return cached
+
+    try:
+        return send_frame(frame_index.frame_path(record), etag, record.captured_at, max_age)
+    except FileNotFoundError:
+        return jsonify({"error": "Frame not found."}), 404
 
 @bp.route("/feeds/<uuid>/metadata", methods=["GET"])
 def get_metadata(uuid):
@@ -45,21 +52,62 @@ def get_metadata(uuid):
     size = os.path.getsize(latest)
     return jsonify({"bytes": size}), 200
 
+def _parse_range_arg(name):
+    """Parse an ISO-8601 query arg into naive UTC. Raises ValueError."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid {name}, expected an ISO-8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _zip_response(entries, download_name):
+    response = Response(stream_zip(entries), mimetype="application/zip")
+    response.headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @bp.route("/feeds/<uuid>/download", methods=["GET"])
 def download_all_frames(uuid):
-    from zipfile import ZipFile
-    from io import BytesIO
+    try:
+        start, end = _parse_range_arg("start"), _parse_range_arg("end")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    feed_dir = os.path.join(STILLS_DIR, uuid)
-    frames = sorted(glob(os.path.join(feed_dir, f"{uuid}_*.jpg")))
+    frames = frame_index.list_frames(uuid, start=start, end=end)
     if not frames:
         return jsonify({"error": "No frames available."}), 404
 
-    memory_file = BytesIO()
-    with ZipFile(memory_file, 'w') as zipf:
-        for frame_path in frames:
-            arcname = os.path.basename(frame_path)
-            zipf.write(frame_path, arcname=arcname)
-    memory_file.seek(0)
+    # Resolve paths now; the stream runs after the request context is gone.
+    entries = [(r.filename, frame_index.frame_path(r), r.captured_at) for r in frames]
+    log_info(f"[CAPTURE API] Streaming {len(entries)} frames for {uuid}")
+    return _zip_response(entries, f"{uuid}_frames.zip")
+
+
+@bp.route("/feeds/download", methods=["GET"])
+def download_feeds():
+    """ZIP of several feeds' frames, one folder per feed: ?feeds=uuid1,uuid2[&start=&end=]"""
+    feed_uuids = [u for u in request.args.get("feeds", "").split(",") if u]
+    if not feed_uuids:
+        return jsonify({"error": "No feeds requested."}), 400
+
+    try:
+        start, end = _parse_range_arg("start"), _parse_range_arg("end")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    entries = []
+    for feed_uuid in dict.fromkeys(feed_uuids):
+        for r in frame_index.list_frames(feed_uuid, start=start, end=end):
+            entries.append((f"{feed_uuid}/{r.filename}", frame_index.frame_path(r), r.captured_at))
+    if not entries:
+        return jsonify({"error": "No frames available."}), 404
 
-    return send_file(memory_file, mimetype='application/zip', as_attachment=True, download_name=f"{uuid}_frames.zip")
\ No newline at end of file
+    log_info(f"[CAPTURE API] Streaming {len(entries)} frames across {len(feed_uuids)} feeds")
+    return _zip_response(entries, "feeds_frames.zip")
@@ -1,22 +1,22 @@
 # app/routes/engineering.py
 import os
-import glob
 import time
 import humanize
 import redis
-from flask import Blueprint, render_template, current_app, send_file
-from app.models import ExternalFeed, db
+from flask import Blueprint, render_template, current_app, send_file, request
+from app.models import ExternalFeed, FrameRecord, db
 from app.plugins.registry import decoders
 from rq import Queue
 from datetime import datetime, timezone
 from app.utils.logger import get_recent_logs
+from app.utils import frame_index, storage_stats, capture_runs
 
 bp = Blueprint("engineering", __name__)
 
+FILE_INDEX_PAGE_SIZE = 200
+
 @bp.route("/engineering")
 def engineering_page():
-    static_path = os.path.join(current_app.root_path, "static")
-
     # System Info
     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
     redis_status = "Unavailable"
@@ -53,15 +53,12 @@ def engineering_page():
 
     # Feed Stats
     feed_stats = []
+    indexed = frame_index.frame_stats()
     for feed in raw_feeds:
-        history_dir = os.path.join(current_app.root_path, "static", "stills", feed.uuid)
-        pattern = os.path.join(history_dir, f"{feed.uuid}_*.jpg")
-        images = glob.glob(pattern)
-        image_count = len(images)
-
-        timestamps = [os.path.getmtime(img) for img in images]
-        if len(timestamps) >= 2:
-            avg_delay = round((max(timestamps) - min(timestamps)) / (len(timestamps) - 1), 1)
+        image_count, oldest, newest = indexed.get(feed.uuid, (0, None, None))
+
+        if image_count >= 2:
+            avg_delay = round((newest - oldest).total_seconds() / (image_count - 1), 1)
         else:
             avg_delay = "n/a"
 
@@ -82,41 +79,32 @@ def engineering_page():
 
 
 
-    # File Index
-    file_index = []
-    for root, dirs, files in os.walk(static_path):
-        for file in files:
-            full_path = os.path.join(root, file)
-            rel_path = os.path.relpath(full_path, static_path)
-            stat = os.stat(full_path)
-
-            file_index.append({
-                "name": rel_path,
-                "modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
-                "size": stat.st_size,
-                "url": f"/static/{rel_path.replace(os.sep, '/')}"
-            })
-
-    file_index.sort(key=lambda f: f["modified"], reverse=True)
-
-    # Orphan detection
-    valid_uuids = {f.uuid for f in raw_feeds}
-    seen_collections = set()
+    # Capture performance from the capture_runs history
+    performance = capture_runs.performance_report()
+    titles = {f.uuid: f.title for f in raw_feeds}
+    for row in performance["feeds"]:
+        row["title"] = titles.get(row["feed_uuid"])
 
-    for entry in file_index:
-        parts = entry["name"].split('/')
-        if parts[0] == "stills":
-            if len(parts) == 2:
-                candidate = parts[1].split(".")[0]
-            elif len(parts) > 2:
-                candidate = parts[1]
-            else:
-                continue
+    # File Index (paginated from the frame index; the static/ tree is never walked per request)
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", FILE_INDEX_PAGE_SIZE, type=int), 1), 1000)
+    frames_page = (FrameRecord.query
+                   .order_by(FrameRecord.captured_at.desc(), FrameRecord.id.desc())
+                   .paginate(page=page, per_page=per_page, error_out=False))
 
-            if candidate != "offline" and candidate not in valid_uuids:
-                seen_collections.add(candidate)
+    file_index = []
+    for record in frames_page.items:
+        rel_path = f"stills/{record.feed_uuid}/{record.filename}"
+        file_index.append({
+            "name": rel_path,
+            "modified": record.captured_at.strftime("%Y-%m-%d %H:%M:%S UTC"),
+            "size": record.size,
+            "url": f"/static/{rel_path}"
+        })
 
-    orphaned_count = len(seen_collections)
+    # Orphan detection: feed directories the storage reconcile found on disk with no feed
+    valid_uuids = {f.uuid for f in raw_feeds}
+    orphaned_count = len([uuid for uuid in storage_stats.per_feed() if uuid not in valid_uuids])
 
     return render_template("engineering.html",
                            now=now,
@@ -126,7 +114,9 @@ def engineering_page():
                            redis_status=redis_status,
                            job_count=job_count,
                            file_index=file_index,
+                           file_page=frames_page,
                            orphaned_count=orphaned_count,
+                           performance=performance,
                            feed_stats=feed_stats)
 
 
@@ -0,0 +1,20 @@
+# app/routes/events_api.py
+from flask import Blueprint, Response, request
+from app.utils.event_stream import event_stream
+
+bp = Blueprint("events_api", __name__)
+
+
+@bp.route("/events", methods=["GET"])
+def stream_events():
+    """
+    Server-Sent Events stream of feed events ("captured", "changed",
+    "deleted", "reload"). Optional ?feeds=uuid1,uuid2 limits it to those feeds.
+    """
+    feeds_param = request.args.get("feeds", "")
+    feed_uuids = {u for u in feeds_param.split(",") if u} or None
+
+    response = Response(event_stream(feed_uuids), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -1,13 +1,92 @@
 # app/routes/feeds_api.py
 from flask import Blueprint, request, jsonify, current_app, send_file
-import os, glob, uuid as uuidlib
+import os, shutil, uuid as uuidlib
+from datetime import datetime
 from app.models import db, ExternalFeed
 from app.utils.logger import log_info, log_error, log_warning
 from app.utils.time_utils import normalize_capture_times
+from app.utils.feed_events import publish_feed_event
+from app.utils import frame_index, metrics, capture_runs
+from app.utils.change_detect import clear_signature
+from app.utils.http_cache import frame_etag, record_etag, not_modified, send_frame, seconds_until_next_capture
 
 bp = Blueprint("feeds_api", __name__)
 
 
+FRAME_SIZES = ("thumb", "medium", "full")
+DISPATCH_MODES = ("interval", "schedule", "adaptive", "disabled")
+
+
+def latest_frame_path(uuid, size="full"):
+    """
+    Path of the latest still for `size`, falling back to the full frame when
+    the rendition has not been written yet. None if nothing was captured.
+    """
+    stills_dir = os.path.join(current_app.root_path, "static", "stills")
+    if size != "full":
+        rendition = os.path.join(stills_dir, uuid, f"{uuid}.{size}.jpg")
+        if os.path.exists(rendition):
+            return rendition
+    latest = os.path.join(stills_dir, f"{uuid}.jpg")
+    return latest if os.path.exists(latest) else None
+
+
+def _latest_validators(feed, size):
+    """
+    ETag and Last-Modified for the latest still, taken from the newest
+    stored frame: a capture that change gating skipped leaves them alone,
+    so clients keep their cached copy. Feeds with no indexed frames fall
+    back to the file on disk. (None, None) if nothing was captured.
+    """
+    record = frame_index.get_frame(feed.uuid, 0)
+    if record:
+        return record_etag(record, size), record.captured_at
+
+    path = latest_frame_path(feed.uuid, size)
+    try:
+        stat = os.stat(path) if path else None
+    except FileNotFoundError:
+        stat = None
+    if stat is None:
+        return None, None
+    return frame_etag(feed.uuid, size, stat.st_mtime_ns, stat.st_size), datetime.utcfromtimestamp(stat.st_mtime)
+
+
+def _send_latest(feed, size):
+    """Serve the latest still, or None if there is nothing on disk."""
+    etag, captured_at = _latest_validators(feed, size)
+    if etag is None:
+        return None
+    max_age = seconds_until_next_capture(feed)
+    cached = not_modified(etag, captured_at, max_age)
+    if cached:
+        return cached
+
+    path = latest_frame_path(feed.uuid, size)
+    if not path:
+        return None
+    try:
+        return send_frame(path, etag, captured_at, max_age)
+    except FileNotFoundError:
+        return None
+
+
+@bp.route("/feeds/<uuid>/latest", methods=["GET"])
+def get_latest(uuid):
+    size = request.args.get("size", "full")
+    if size not in FRAME_SIZES:
+        return jsonify({"error": f"Invalid size, expected one of {', '.join(FRAME_SIZES)}"}), 400
+
+    feed = ExternalFeed.query.filter_by(uuid=uuid).first()
+    if not feed:
+        return jsonify({"error": "Feed not found"}), 404
+
+    response = _send_latest(feed, size)
+    if response is None:
+        return jsonify({"error": "No capture available."}), 404
+    return response
+
+
 @bp.route("/feeds/<uuid>/frames/<int:index>", methods=["GET"])
 def get_frame(uuid, index):
     feed = ExternalFeed.query.filter_by(uuid=uuid).first()
@@ -19,14 +98,34 @@ def get_frame(uuid, index):
         log_error(f"[API] Frame index exceeds history length: UUID={uuid} Index=({index})")
         return jsonify({"error": "Frame index exceeds history length"}), 400
 
-    stills_dir = os.path.join(current_app.root_path, "static", "stills", uuid)
+    size = request.args.get("size", "full")
+    if size not in FRAME_SIZES:
+        return jsonify({"error": f"Invalid size, expected one of {', '.join(FRAME_SIZES)}"}), 400
+
     offline_path = os.path.join(current_app.root_path, "static", "offline.jpg")
-    files = sorted(glob.glob(os.path.join(stills_dir, f"{uuid}_*.jpg")), reverse=True)
 
-    if index < len(files):
-        return send_file(files[index])
-    else:
-        return send_file(offline_path)
+    # Renditions exist for the latest frame only; older frames are always full size.
+    if index == 0 and size != "full":
+        response = _send_latest(feed, size)
+        if response is not None:
+            return response
+
+    record = frame_index.get_frame(uuid, index)
+
+    if record:
+        etag = record_etag(record)
+        max_age = seconds_until_next_capture(feed)
+        cached = not_modified(etag, record.captured_at, max_age)
+        if cached:
+            return cached
+        try:
+            return send_frame(frame_index.frame_path(record), etag, record.captured_at, max_age)
+        except FileNotFoundError:
+            log_warning(f"[API] Indexed frame missing on disk: {record.filename}")
+
+    response = send_file(offline_path)
+    response.cache_control.no_cache = True
+    return response
 
 
 @bp.route("/feeds", methods=["GET"])
@@ -48,7 +147,7 @@ def add_feed():
             capture_at_times = normalize_capture_times(capture_at_times)
 
         dispatch_mode = data.get("dispatch_mode", "interval")
-        if dispatch_mode not in ["interval", "schedule", "disabled"]:
+        if dispatch_mode not in DISPATCH_MODES:
             return jsonify({"error": "Invalid dispatch_mode"}), 400
 
         feed = ExternalFeed(
@@ -71,10 +170,18 @@ def add_feed():
             gps_longitude=data.get("gps_longitude"),
             gps_img_direction=data.get("gps_img_direction"),
             gps_img_direction_ref=data.get("gps_img_direction_ref"),
+
+            dedup_enabled=data.get("dedup_enabled", False),
+            dedup_tolerance=data.get("dedup_tolerance", 0),
+            change_threshold=data.get("change_threshold"),
+            keyframe_minutes=data.get("keyframe_minutes"),
+            adaptive_min_seconds=data.get("adaptive_min_seconds"),
+            adaptive_max_seconds=data.get("adaptive_max_seconds"),
         )
 
         db.session.add(feed)
         db.session.commit()
+        publish_feed_event("changed", feed.uuid)
         return jsonify(feed.to_dict()), 201
 
     except ValueError as e:
@@ -98,14 +205,21 @@ def update_feed(uuid):
 
     data = request.json
     try:
+        adaptive_bounds = (feed.seconds_per_capture, feed.adaptive_min_seconds, feed.adaptive_max_seconds)
         for field in [
             "title", "seconds_per_capture", "decoder_name", "history_length",
             "crop_x", "crop_y", "crop_width", "crop_height", "crop_active",
-            "gps_latitude", "gps_longitude", "gps_img_direction", "gps_img_direction_ref"
+            "gps_latitude", "gps_longitude", "gps_img_direction", "gps_img_direction_ref",
+            "dedup_enabled", "dedup_tolerance", "change_threshold", "keyframe_minutes",
+            "adaptive_min_seconds", "adaptive_max_seconds"
         ]:
             if field in data:
                 setattr(feed, field, data[field])
 
+        # The learned interval was fitted to the old bounds; start over from the new ones.
+        if (feed.seconds_per_capture, feed.adaptive_min_seconds, feed.adaptive_max_seconds) != adaptive_bounds:
+            feed.adaptive_seconds = None
+
         if "capture_at_times" in data:
             capture_at_times = data["capture_at_times"]
             if capture_at_times is not None:
@@ -113,11 +227,12 @@ def update_feed(uuid):
             feed.capture_at_times = capture_at_times
 
         if "dispatch_mode" in data:
-            if data["dispatch_mode"] not in ["interval", "schedule", "disabled"]:
+            if data["dispatch_mode"] not in DISPATCH_MODES:
                 return jsonify({"error": "Invalid dispatch_mode"}), 400
             feed.dispatch_mode = data["dispatch_mode"]
 
         db.session.commit()
+        publish_feed_event("changed", feed.uuid)
         return jsonify(feed.to_dict()), 200
 
     except ValueError as e:
@@ -134,14 +249,17 @@ def delete_feed(uuid):
     stills_dir = os.path.join(current_app.root_path, "static", "stills", uuid)
     latest_file = os.path.join(current_app.root_path, "static", "stills", f"{uuid}.jpg")
     if os.path.exists(stills_dir):
-        for f in glob.glob(os.path.join(stills_dir, f"{uuid}_*.jpg")):
-            os.remove(f)
-        os.rmdir(stills_dir)
+        shutil.rmtree(stills_dir)
     if os.path.exists(latest_file):
         os.remove(latest_file)
 
+    frame_index.remove_feed(uuid)
+    clear_signature(uuid)
+    metrics.forget_feed(uuid)
+    capture_runs.remove_feed(uuid)
     db.session.delete(feed)
     db.session.commit()
+    publish_feed_event("deleted", uuid)
     return jsonify({"message": "Feed deleted"}), 200
 
 
@@ -166,6 +284,12 @@ def backup_feeds():
             "gps_longitude": f.gps_longitude,
             "gps_img_direction": f.gps_img_direction,
             "gps_img_direction_ref": f.gps_img_direction_ref,
+            "dedup_enabled": bool(f.dedup_enabled),
+            "dedup_tolerance": f.dedup_tolerance or 0,
+            "change_threshold": f.change_threshold,
+            "keyframe_minutes": f.keyframe_minutes,
+            "adaptive_min_seconds": f.adaptive_min_seconds,
+            "adaptive_max_seconds": f.adaptive_max_seconds,
         }
         for f in feeds
     ]
@@ -198,7 +322,7 @@ def restore_feeds():
                 capture_at_times = normalize_capture_times(capture_at_times)
 
             dispatch_mode = feed.get("dispatch_mode", "interval")
-            if dispatch_mode not in ["interval", "schedule", "disabled"]:
+            if dispatch_mode not in DISPATCH_MODES:
                 dispatch_mode = "interval"  # fail-safe fallback
 
             new_feed = ExternalFeed(
@@ -220,11 +344,19 @@ def restore_feeds():
                 gps_latitude=feed.get("gps_latitude"),
                 gps_longitude=feed.get("gps_longitude"),
                 gps_img_direction=feed.get("gps_img_direction"),
-                gps_img_direction_ref=feed.get("gps_img_direction_ref")
+                gps_img_direction_ref=feed.get("gps_img_direction_ref"),
+
+                dedup_enabled=feed.get("dedup_enabled", False),
+                dedup_tolerance=feed.get("dedup_tolerance", 0),
+                change_threshold=feed.get("change_threshold"),
+                keyframe_minutes=feed.get("keyframe_minutes"),
+                adaptive_min_seconds=feed.get("adaptive_min_seconds"),
+                adaptive_max_seconds=feed.get("adaptive_max_seconds")
             )
             db.session.add(new_feed)
 
         db.session.commit()
+        publish_feed_event("reload")
         return jsonify({"message": f"Restored {len(data)} feeds successfully."}), 200
 
     except Exception as e:
@@ -243,9 +375,7 @@ def delete_all_feeds():
 
         try:
             if os.path.exists(stills_dir):
-                for f in glob.glob(os.path.join(stills_dir, f"{feed.uuid}_*.jpg")):
-                    os.remove(f)
-                os.rmdir(stills_dir)
+                shutil.rmtree(stills_dir)
 
             if os.path.exists(latest_file):
                 os.remove(latest_file)
@@ -253,9 +383,14 @@ def delete_all_feeds():
         except Exception as e:
             log_warning(f"[API] Failed to delete files for feed {feed.uuid}: {e}")
 
+        frame_index.remove_feed(feed.uuid)
+        clear_signature(feed.uuid)
+        metrics.forget_feed(feed.uuid)
+        capture_runs.remove_feed(feed.uuid)
         db.session.delete(feed)
         deleted += 1
 
     db.session.commit()
+    publish_feed_event("reload")
     log_info(f"[API] Deleted {deleted} feeds and associated stills.")
     return jsonify({"message": f"{deleted} feeds deleted"}), 200
@@ -1,37 +1,36 @@
 # app/routes/system_api.py
-import os
 import humanize
-from flask import Blueprint, current_app, jsonify
+from flask import Blueprint, Response, jsonify
 from app.utils.logger import log_info, log_warning, log_error
+from app.utils import storage_stats, metrics
 
 bp = Blueprint("system_api", __name__)
 
 @bp.route("/health", methods=["GET"])
 def health_check():
     try:
-        static_path = os.path.join(current_app.root_path, "static")
-        total_size = 0
-        total_files = 0
-
-        for root, dirs, files in os.walk(static_path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                try:
-                    stat = os.stat(full_path)
-                    total_size += stat.st_size
-                    total_files += 1
-                except FileNotFoundError:
-                    log_warning(f"[HEALTH] Skipped disappearing file: {full_path}")
-
-        log_info(f"[HEALTH] static/ scanned: {total_files} files, {total_size} bytes")
+        # Counters are kept current by captures/pruning and re-measured by
+        # the storage reconcile job (app/tasks/storage.py); no disk walk here.
+        total_files, total_size, reconciled_at = storage_stats.totals()
 
         return jsonify({
             "status": "ok",
             "static_file_count": total_files,
             "static_total_size_bytes": total_size,
-            "static_total_size_human": humanize.naturalsize(total_size, binary=True)
+            "static_total_size_human": humanize.naturalsize(total_size, binary=True),
+            "storage_reconciled_at": reconciled_at.isoformat() if reconciled_at else None
         }), 200
 
     except Exception as e:
         log_error(f"[HEALTH] Exception during health check: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Capture and dispatcher metrics from all processes, in Prometheus text format."""
+    try:
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+    except Exception as e:
+        log_error(f"[METRICS] Failed to render metrics: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
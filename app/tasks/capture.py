@@ -1,14 +1,30 @@
 # app/tasks/capture.py
+import io
 import os
 import cv2
-import glob
 import time
 import piexif
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import current_app
 from app.models.external_feed import db, ExternalFeed
-from app.plugins.registry import get_decoder_by_name
+from rq import get_current_job
+from app.plugins.registry import get_decoder_by_name, decode_frame, DecodeTimeout
 from app.utils.logger import log_info, log_warning, log_error
+from app.utils.feed_events import publish_feed_event
+from app.utils import frame_index
+from app.utils.frame_hash import content_hash, perceptual_hash, hamming
+from app.utils.change_detect import detect_change, save_signature
+from app.utils import adaptive, metrics, capture_runs
+from app.utils.metrics import timed
+
+CROP_SOURCE_REFRESH_SECONDS = int(os.getenv("CROP_SOURCE_REFRESH_SECONDS", "300"))
+CAPTURE_BATCH_THREADS = int(os.getenv("CAPTURE_BATCH_THREADS", "8"))
+
+# Downscaled copies of the latest frame, largest first: name -> bounding box.
+RENDITIONS = [
+    ("medium", (int(os.getenv("MEDIUM_WIDTH", "640")), int(os.getenv("MEDIUM_HEIGHT", "480")))),
+    ("thumb", (int(os.getenv("THUMBNAIL_WIDTH", "100")), int(os.getenv("THUMBNAIL_HEIGHT", "100")))),
+]
 
 def convert_to_dms_rational(deg_float):
     try:
@@ -62,9 +78,310 @@ def build_exif(feed, now):
         log_error(f"[EXIF] Error building EXIF: {e}")
         return None
 
+def encode_jpeg(frame, exif_bytes=None):
+    """Encode a frame to JPEG in memory and splice in the EXIF segment."""
+    ok, buffer = cv2.imencode(".jpg", frame)
+    if not ok:
+        raise RuntimeError("Failed to encode frame as JPEG")
+    jpeg_bytes = buffer.tobytes()
+
+    if exif_bytes:
+        output = io.BytesIO()
+        piexif.insert(exif_bytes, jpeg_bytes, output)
+        jpeg_bytes = output.getvalue()
+    return jpeg_bytes
+
+def write_frame_files(jpeg_bytes, history_file, latest_path):
+    """
+    Write the history file once, then swap `latest_path` over to it with a
+    hardlink + rename so readers never see a half-written latest frame.
+    Falls back to writing a second copy where hardlinks are unsupported.
+    """
+    tmp_history = f"{history_file}.{os.getpid()}.tmp"
+    with open(tmp_history, "wb") as f:
+        f.write(jpeg_bytes)
+    os.replace(tmp_history, history_file)
+
+    tmp_latest = f"{latest_path}.{os.getpid()}.tmp"
+    try:
+        os.link(history_file, tmp_latest)
+    except FileExistsError:
+        os.remove(tmp_latest)
+        os.link(history_file, tmp_latest)
+    except OSError:
+        with open(tmp_latest, "wb") as f:
+            f.write(jpeg_bytes)
+    os.replace(tmp_latest, latest_path)
+
+def crop_frame(feed, frame):
+    """
+    Return the feed's crop region as a view into `frame` (no pixel copy),
+    clamped to the frame bounds. Returns `frame` unchanged when cropping is
+    off, incomplete, or the region falls outside the frame.
+    """
+    crop = (feed.crop_x, feed.crop_y, feed.crop_width, feed.crop_height)
+    if not feed.crop_active or any(v is None for v in crop):
+        return frame
+
+    height, width = frame.shape[:2]
+    x, y, w, h = (int(v) for v in crop)
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+
+    if x1 <= x0 or y1 <= y0:
+        log_warning(f"[CAPTURE] Crop region {crop} outside {width}x{height} frame for {feed.uuid}, not cropping")
+        return frame
+    if (x0, y0, x1, y1) != (x, y, x + w, y + h):
+        log_warning(f"[CAPTURE] Crop region {crop} clamped to {width}x{height} frame for {feed.uuid}")
+    return frame[y0:y1, x0:x1]
+
+def save_crop_source(frame, source_path):
+    """
+    Keep an occasional uncropped copy of the frame so the region editor can
+    draw on the full picture while cropping is active.
+    """
+    try:
+        if time.time() - os.path.getmtime(source_path) < CROP_SOURCE_REFRESH_SECONDS:
+            return
+    except OSError:
+        pass
+
+    ok, buffer = cv2.imencode(".jpg", frame)
+    if not ok:
+        log_warning(f"[CAPTURE] Failed to encode crop source frame {source_path}")
+        return
+    tmp_path = f"{source_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buffer.tobytes())
+    os.replace(tmp_path, source_path)
+
+def write_renditions(frame, history_dir, feed_uuid):
+    """
+    Write `{uuid}.medium.jpg` and `{uuid}.thumb.jpg` next to the history,
+    each scaled to fit its bounding box. Each rendition is resized from the
+    previous (larger) one, so the full frame is only downscaled once.
+    """
+    source = frame
+    for name, (max_w, max_h) in RENDITIONS:
+        height, width = source.shape[:2]
+        scale = min(max_w / width, max_h / height, 1.0)
+        if scale < 1.0:
+            size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            source = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+
+        ok, buffer = cv2.imencode(".jpg", source)
+        if not ok:
+            log_warning(f"[CAPTURE] Failed to encode {name} rendition for {feed_uuid}")
+            continue
+        path = os.path.join(history_dir, f"{feed_uuid}.{name}.jpg")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.tobytes())
+        os.replace(tmp_path, path)
+
+def find_duplicate(feed, frame, previous):
+    """
+    Hash `frame` and compare it with `previous`, the feed's newest stored
+    frame record. Returns ((content_hash, perceptual_hash), previous or None).
+    Tolerance 0 needs identical pixels; otherwise perceptual hashes may
+    differ by up to `dedup_tolerance` bits.
+    """
+    hashes = (content_hash(frame), perceptual_hash(frame))
+    if previous is None or previous.content_hash is None:
+        return hashes, None
+
+    tolerance = feed.dedup_tolerance or 0
+    if tolerance <= 0:
+        matches = previous.content_hash == hashes[0]
+    else:
+        matches = previous.perceptual_hash is not None \
+            and hamming(previous.perceptual_hash, hashes[1]) <= tolerance
+    return hashes, previous if matches else None
+
+def link_duplicate(source_path, history_file):
+    """Hardlink an existing still under a new history name. False if linking isn't possible."""
+    tmp_path = f"{history_file}.{os.getpid()}.tmp"
+    try:
+        os.link(source_path, tmp_path)
+    except FileExistsError:
+        os.remove(tmp_path)
+        return link_duplicate(source_path, history_file)
+    except OSError:
+        return False
+    os.replace(tmp_path, history_file)
+    return True
+
+def discard_history_file(path):
+    """
+    Remove a history still whose index row will never be written, so it
+    doesn't sit on disk unseen by retention and the disk budget.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log_warning(f"[CAPTURE] Failed to remove unindexed still {path}: {e}")
+
+def discard_result(feed_uuid, result, stills_dir):
+    """Undo process_frame's history file after its database changes were rolled back."""
+    if result and result.get("stored"):
+        discard_history_file(os.path.join(stills_dir, feed_uuid, result["filename"]))
+
+def process_frame(feed, frame, previous, now, stills_dir):
+    """
+    Crop, gate, deduplicate, encode and write one decoded frame. Reads
+    `feed` and `previous` (its newest FrameRecord) but makes no database
+    changes, so batch captures can run it on worker threads. Returns a dict
+    describing what was stored, or stored=False if change gating skipped it;
+    either way "timings" holds the seconds spent per stage.
+    """
+    timings = {}
+    timestamp = now.strftime(frame_index.FILENAME_TIME_FORMAT)
+    history_dir = os.path.join(stills_dir, feed.uuid)
+    latest_path = os.path.join(stills_dir, f"{feed.uuid}.jpg")
+    os.makedirs(history_dir, exist_ok=True)
+
+    history_file = os.path.join(history_dir, f"{feed.uuid}_{timestamp}.jpg")
+
+    with timed(timings, "crop"):
+        cropped = crop_frame(feed, frame)
+        if cropped is not frame:
+            save_crop_source(frame, os.path.join(history_dir, f"{feed.uuid}.source.jpg"))
+            frame = cropped
+
+    sig, score = None, None
+    if feed.change_threshold or feed.dispatch_mode == "adaptive":
+        with timed(timings, "change"):
+            store, score, sig = detect_change(feed, frame, previous.captured_at if previous else None, now)
+        if not store:
+            log_info(f"[CAPTURE] No change for {feed.uuid} (score {score:.2f} < {feed.change_threshold}), not stored")
+            return {"stored": False, "score": score, "timings": timings}
+
+    hashes, duplicate_of = (None, None), None
+    if feed.dedup_enabled:
+        with timed(timings, "dedup"):
+            hashes, duplicate_of = find_duplicate(feed, frame, previous)
+
+    if duplicate_of and link_duplicate(os.path.join(history_dir, duplicate_of.filename), history_file):
+        # Same picture as the latest still: no encode, and the latest
+        # file and renditions already show it.
+        size = duplicate_of.size
+        hashes = (duplicate_of.content_hash, duplicate_of.perceptual_hash)
+        log_info(f"[CAPTURE] Unchanged frame for {feed.uuid}, linked to {duplicate_of.filename}")
+    else:
+        duplicate_of = None
+        with timed(timings, "encode"):
+            jpeg_bytes = encode_jpeg(frame, build_exif(feed, now))
+        try:
+            with timed(timings, "write"):
+                write_frame_files(jpeg_bytes, history_file, latest_path)
+            with timed(timings, "renditions"):
+                write_renditions(frame, history_dir, feed.uuid)
+        except Exception:
+            discard_history_file(history_file)
+            raise
+        size = len(jpeg_bytes)
+        log_info(f"[CAPTURE] Frame saved with EXIF for {feed.uuid}")
+
+    return {
+        "stored": True,
+        "filename": os.path.basename(history_file),
+        "size": size,
+        "hashes": hashes,
+        "signature": sig,
+        "score": score,
+        "duplicate": duplicate_of is not None,
+        "timings": timings,
+    }
+
+def record_success(feed, result, now):
+    """Index the stored frame (if any) and mark the feed captured. The caller commits."""
+    if result["stored"]:
+        # Pruning happens in the batched retention task (app/tasks/retention.py)
+        content, perceptual = result["hashes"]
+        frame_index.add_frame(feed.uuid, result["filename"], now, result["size"],
+                              content_hash=content, perceptual_hash=perceptual)
+    feed.last_capture_at = now
+    feed.last_failed_at = None
+    feed.failure_count = 0
+    feed.is_capturing = False
+    feed.capture_lease_until = None
+
+    score = result.get("score")
+    if score is not None:
+        feed.last_change_score = score
+    if feed.dispatch_mode == "adaptive":
+        interval = adaptive.current_interval(feed.adaptive_seconds, feed.seconds_per_capture,
+                                             feed.adaptive_min_seconds, feed.adaptive_max_seconds)
+        feed.adaptive_seconds = adaptive.next_interval(interval, score, feed.adaptive_min_seconds,
+                                                       feed.adaptive_max_seconds)
+
+def record_failure(feed):
+    """Mark the feed failed so the dispatcher retries it (with backoff in adaptive mode). The caller commits."""
+    feed.last_failed_at = datetime.utcnow()
+    feed.failure_count = (feed.failure_count or 0) + 1
+    feed.is_capturing = False
+    feed.capture_lease_until = None
+
+def announce_success(feed, result, now):
+    """Post-commit side effects of a successful capture."""
+    if result.get("signature") is not None:
+        save_signature(feed.uuid, result["signature"])
+    if result["stored"]:
+        publish_feed_event("captured", feed.uuid, ok=True, captured_at=now.isoformat(),
+                           duplicate=result["duplicate"])
+    else:
+        publish_feed_event("captured", feed.uuid, ok=True, captured_at=now.isoformat(), changed=False)
+
+_app = None
+
+def get_app():
+    """
+    Return this process's Flask app, building it on first use. A warm worker
+    (app/tasks/worker.py) pays for create_app() once instead of once per job.
+    """
+    global _app
+    if _app is None:
+        from app import create_app
+        _app = create_app()
+    return _app
+
+def queue_wait_seconds():
+    """Seconds the current RQ job spent queued, or None outside a job."""
+    job = get_current_job()
+    if job is None or job.enqueued_at is None:
+        return None
+    enqueued_at = job.enqueued_at.replace(tzinfo=None)  # RQ stores UTC
+    return max(0.0, (datetime.utcnow() - enqueued_at).total_seconds())
+
+def capture_result(error, result):
+    """Outcome label for feedalor_captures_total."""
+    if error is not None:
+        return "timeout" if isinstance(error, DecodeTimeout) else "failed"
+    return "stored" if result["stored"] else "unchanged"
+
+def record_metrics(job_name, job_started, queue_wait, captures):
+    """
+    Send one job's samples to Redis in a single round-trip. `captures` is a
+    list of (feed, outcome, timings) with outcome from capture_result().
+    """
+    observations = [("feedalor_capture_job_seconds", {"job": job_name}, time.perf_counter() - job_started)]
+    if queue_wait is not None:
+        observations.append(("feedalor_capture_queue_wait_seconds", {"job": job_name}, queue_wait))
+    counters = []
+    for feed, outcome, timings in captures:
+        for stage, seconds in timings.items():
+            observations.append(("feedalor_capture_stage_seconds",
+                                 {"decoder": feed.decoder_name, "stage": stage}, seconds))
+        counters.append(("feedalor_captures_total",
+                         {"feed": feed.uuid, "decoder": feed.decoder_name, "result": outcome}, 1))
+    metrics.record(observations=observations, counters=counters)
+
 def capture_frame(feed_uuid):
-    from app import create_app
-    app = create_app()
+    job_started = time.perf_counter()
+    queue_wait = queue_wait_seconds()
+    app = get_app()
 
     with app.app_context():
         log_info(f"[CAPTURE] Starting capture for {feed_uuid}")
@@ -74,65 +391,138 @@ def capture_frame(feed_uuid):
             log_warning(f"[CAPTURE] Feed {feed_uuid} not found, skipping.")
             return
 
+        setup_ms = (time.perf_counter() - job_started) * 1000
+        log_info(f"[CAPTURE] Job setup for {feed_uuid} took {setup_ms:.1f} ms")
+
+        started_at = datetime.utcnow()
         DecoderClass = get_decoder_by_name(feed.decoder_name)
         if not DecoderClass:
             log_error(f"[CAPTURE] Decoder not found for feed {feed_uuid}")
+            record_failure(feed)
+            capture_runs.add_run(feed, started_at, "failed", {}, queue_wait, error="decoder not found")
+            db.session.commit()
+            publish_feed_event("captured", feed.uuid, ok=False)
             return
 
+        timings, unindexed = {}, None
         try:
-            frame = DecoderClass.decode(feed.url)
-
+            with timed(timings, "decode"):
+                frame = decode_frame(DecoderClass, feed.url)
             now = datetime.utcnow()
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
+            previous = frame_index.get_frame(feed.uuid, 0)
+            result = unindexed = process_frame(feed, frame, previous, now, frame_index.stills_root())
+            timings.update(result["timings"])
 
-            history_dir = os.path.join(current_app.root_path, "static", "stills", feed.uuid)
-            latest_path = os.path.join(current_app.root_path, "static", "stills", f"{feed.uuid}.jpg")
-            os.makedirs(history_dir, exist_ok=True)
+            outcome = capture_result(None, result)
+            with timed(timings, "commit"):
+                record_success(feed, result, now)
+                capture_runs.add_run(feed, started_at, outcome, timings, queue_wait, result.get("size"))
+                db.session.commit()
+            unindexed = None
+            announce_success(feed, result, now)
 
-            history_file = os.path.join(history_dir, f"{feed.uuid}_{timestamp}.jpg")
+            if result["stored"]:
+                print(f"[+] Saved frame for {feed.uuid}")
 
-            # Save to temp file to inject EXIF
-            temp_file = os.path.join(history_dir, f"temp_{feed.uuid}.jpg")
-            cv2.imwrite(temp_file, frame)
+        except Exception as e:
+            log_error(f"[CAPTURE] Exception during capture for {feed.uuid}: {e}")
+            db.session.rollback()
+            discard_result(feed.uuid, unindexed, frame_index.stills_root())
+            outcome = capture_result(e, None)
+            record_failure(feed)
+            capture_runs.add_run(feed, started_at, outcome, timings, queue_wait, error=e)
+            db.session.commit()
+            publish_feed_event("captured", feed.uuid, ok=False)
 
-            exif_bytes = build_exif(feed, now)
-            if exif_bytes:
-                piexif.insert(exif_bytes, temp_file, history_file)
-                piexif.insert(exif_bytes, temp_file, latest_path)
-            else:
-                os.rename(temp_file, history_file)
-                os.replace(history_file, latest_path)
+        record_metrics("capture_frame", job_started, queue_wait, [(feed, outcome, timings)])
 
-            os.remove(temp_file)
+def _capture_one(feed, previous, stills_dir):
+    """Decode and write one feed of a batch. Runs on a pool thread, outside the app context."""
+    DecoderClass = get_decoder_by_name(feed.decoder_name)
+    if not DecoderClass:
+        raise LookupError(f"Decoder not found: {feed.decoder_name}")
+    timings = {}
+    with timed(timings, "decode"):
+        frame = decode_frame(DecoderClass, feed.url)
+    now = datetime.utcnow()
+    result = process_frame(feed, frame, previous, now, stills_dir)
+    result["timings"].update(timings)
+    return now, result
 
-            log_info(f"[CAPTURE] Frame saved with EXIF for {feed.uuid}")
+def _record_batch(outcomes, started_at, queue_wait):
+    """Record each batch outcome as capture_frame does. The caller commits."""
+    for feed, outcome, error in outcomes:
+        if error is None:
+            now, result = outcome
+            record_success(feed, result, now)
+            capture_runs.add_run(feed, started_at, capture_result(None, result), result["timings"],
+                                 queue_wait, result.get("size"))
+        else:
+            log_error(f"[CAPTURE] Exception during capture for {feed.uuid}: {error}")
+            record_failure(feed)
+            capture_runs.add_run(feed, started_at, capture_result(error, None), {}, queue_wait, error=error)
 
-            files = sorted(glob.glob(os.path.join(history_dir, f"{feed.uuid}_*.jpg")), reverse=True)
+def capture_batch(feed_uuids):
+    """
+    Capture several feeds in one job. Sources are fetched concurrently on a
+    thread pool (decoding and file writes release the GIL); results are
+    recorded in a single transaction. The dispatcher groups feeds whose
+    decoder sets `batch_size` > 1 into these jobs.
+    """
+    job_started = time.perf_counter()
+    queue_wait = queue_wait_seconds()
+    started_at = datetime.utcnow()
+    app = get_app()
 
-            if feed.dispatch_mode != "schedule":
-                wiggle_factor = 1.5
-                max_age = wiggle_factor * (feed.history_length or 1) * (feed.seconds_per_capture or 60)
-                cutoff = time.time() - max_age
+    with app.app_context():
+        feeds = ExternalFeed.query.filter(ExternalFeed.uuid.in_(feed_uuids)).all()
+        if not feeds:
+            return
 
-                for f in files:
-                    if os.path.getmtime(f) < cutoff:
-                        os.remove(f)
-                        log_info(f"[CAPTURE] Pruned old frame max_age: {f}")
+        previous = {feed.uuid: frame_index.get_frame(feed.uuid, 0) for feed in feeds}
+        stills_dir = frame_index.stills_root()
 
-            files = sorted(glob.glob(os.path.join(history_dir, f"{feed.uuid}_*.jpg")), reverse=True)
-            for f in files[feed.history_length:]:
-                os.remove(f)
-                log_info(f"[CAPTURE] Pruned old frame history_length: {f}")
+        outcomes = []
+        with ThreadPoolExecutor(max_workers=min(CAPTURE_BATCH_THREADS, len(feeds))) as pool:
+            futures = [(feed, pool.submit(_capture_one, feed, previous[feed.uuid], stills_dir))
+                       for feed in feeds]
+            for feed, future in futures:
+                try:
+                    outcomes.append((feed, future.result(), None))
+                except Exception as e:
+                    outcomes.append((feed, None, e))
 
-            feed.last_capture_at = now
-            feed.last_failed_at = None
-            feed.is_capturing = False
+        try:
+            _record_batch(outcomes, started_at, queue_wait)
+            commit_started = time.perf_counter()
             db.session.commit()
-
-            print(f"[+] Saved frame for {feed.uuid}")
-
+            commit_seconds = (time.perf_counter() - commit_started) / len(outcomes)
         except Exception as e:
-            log_error(f"[CAPTURE] Exception during capture for {feed.uuid}: {e}")
-            feed.last_failed_at = datetime.utcnow()
-            feed.is_capturing = False
+            # Nothing from the batch was recorded; fail every feed so none is
+            # left holding its lease or announced as captured.
+            log_error(f"[CAPTURE] Failed to record batch of {len(outcomes)} feeds: {e}")
+            db.session.rollback()
+            for feed, outcome, error in outcomes:
+                if error is None:
+                    discard_result(feed.uuid, outcome[1], stills_dir)
+            outcomes = [(feed, None, e) for feed, _, _ in outcomes]
+            _record_batch(outcomes, started_at, queue_wait)
             db.session.commit()
+            commit_seconds = 0.0
+
+        for feed, outcome, error in outcomes:
+            if error is None:
+                announce_success(feed, outcome[1], outcome[0])
+            else:
+                publish_feed_event("captured", feed.uuid, ok=False)
+
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        elapsed_ms = (time.perf_counter() - job_started) * 1000
+        log_info(f"[CAPTURE] Batch of {len(feeds)} feeds done in {elapsed_ms:.1f} ms ({failed} failed)")
+
+        captures = []
+        for feed, outcome, error in outcomes:
+            # The shared commit is split evenly across the batch.
+            timings = dict(outcome[1]["timings"], commit=commit_seconds) if error is None else {}
+            captures.append((feed, capture_result(error, outcome and outcome[1]), timings))
+        record_metrics("capture_batch", job_started, queue_wait, captures)
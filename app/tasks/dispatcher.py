@@ -1,74 +1,452 @@
 # app/tasks/dispatcher.py
 import time
 import os
+import json
+import heapq
+import itertools
+import hashlib
+import threading
+from queue import Queue as EventQueue, Empty
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 from rq import Queue
-from redis import Redis
-from urllib.parse import urlparse
+from rq.job import Job, JobStatus
+from rq.exceptions import NoSuchJobError
 from app import create_app
 from app.models.external_feed import db, ExternalFeed
 from app.utils.logger import log_info, log_error, log_warning
-from app.tasks.capture import capture_frame
+from app.tasks.capture import capture_frame, capture_batch
+from app.plugins.registry import get_decoder_by_name
+from app.tasks.retention import prune_all_feeds, RETENTION_INTERVAL_SECONDS
+from app.tasks.storage import reconcile_storage
+from app.utils.storage_stats import STORAGE_RECONCILE_SECONDS
+from app.utils.redis_conn import get_redis_connection
+from app.utils.feed_events import FEED_EVENTS_CHANNEL
+from app.utils import frame_index, adaptive, metrics
 
 QUEUE_NAME = "feed-tasks"
+# Retention and storage reconcile run on their own queue and worker, so a
+# long walk of static/ never holds up the captures queued behind it.
+HOUSEKEEPING_QUEUE_NAME = "feed-housekeeping"
+HOUSEKEEPING_JOB_TIMEOUT = int(os.getenv("HOUSEKEEPING_JOB_TIMEOUT", "1800"))
 
-def get_redis_connection():
-    url = os.getenv("REDIS_URL", "redis://localhost:6379")
-    parsed = urlparse(url)
-    return Redis(host=parsed.hostname, port=parsed.port)
+SCHEDULE_WIGGLE_SECONDS = 30
+FAILED_FEED_RETRY = int(os.getenv("FAILED_FEED_RETRY", "5"))
+RESYNC_SECONDS = int(os.getenv("DISPATCHER_RESYNC_SECONDS", "300"))
 
-def dispatcher_loop(interval=5):
+# Politeness towards shared hosts (NVRs, public camera sites)
+HOST_MAX_IN_FLIGHT = int(os.getenv("HOST_MAX_IN_FLIGHT", "0"))          # 0 = unlimited
+HOST_MIN_SPACING_SECONDS = float(os.getenv("HOST_MIN_SPACING_SECONDS", "0"))
+HOST_BUSY_RETRY_SECONDS = 1.0
+DISPATCH_JITTER = os.getenv("DISPATCH_JITTER", "true").lower() in ("1", "true", "yes")
+
+# A dispatched feed holds a capture lease until the job records its result.
+# If the job dies first, the lease expires and the dispatcher reclaims the
+# feed. A capture job is dropped if it waits in the queue longer than
+# CAPTURE_QUEUE_TTL and killed after running CAPTURE_JOB_TIMEOUT, so the
+# lease covers both (plus a grace period) and a reclaimed feed can never
+# still have a live job.
+CAPTURE_QUEUE_TTL = int(os.getenv("CAPTURE_QUEUE_TTL", "120"))
+CAPTURE_JOB_TIMEOUT = int(os.getenv("CAPTURE_JOB_TIMEOUT", "180"))
+LEASE_GRACE_SECONDS = 30
+CAPTURE_LEASE_SECONDS = CAPTURE_QUEUE_TTL + CAPTURE_JOB_TIMEOUT + LEASE_GRACE_SECONDS
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def feed_host(url):
+    """Host a feed's captures load, used for per-host limits."""
+    host = urlsplit(url or "").hostname
+    return host or (url or "")
+
+
+def feed_phase(feed_uuid):
+    """Stable fraction in [0, 1) derived from the feed uuid."""
+    return int(hashlib.md5(feed_uuid.encode()).hexdigest()[:8], 16) / 0x100000000
+
+
+class FeedSchedule:
+    """The subset of a feed the dispatcher needs, parsed once per change."""
+
+    __slots__ = ("uuid", "decoder_name", "host", "phase", "mode", "seconds_per_capture", "capture_times",
+                 "last_capture_at", "last_failed_at", "failure_count", "adaptive_seconds",
+                 "adaptive_max_seconds", "is_capturing", "lease_until", "due")
+
+    def __init__(self, feed):
+        self.uuid = feed.uuid
+        self.decoder_name = feed.decoder_name
+        self.host = feed_host(feed.url)
+        self.phase = feed_phase(feed.uuid)
+        self.mode = feed.dispatch_mode
+        self.seconds_per_capture = feed.seconds_per_capture
+        self.last_capture_at = feed.last_capture_at
+        self.last_failed_at = feed.last_failed_at
+        self.failure_count = feed.failure_count or 0
+        self.adaptive_max_seconds = adaptive.bounds(feed.adaptive_min_seconds, feed.adaptive_max_seconds)[1]
+        self.adaptive_seconds = adaptive.current_interval(feed.adaptive_seconds, feed.seconds_per_capture,
+                                                          feed.adaptive_min_seconds, feed.adaptive_max_seconds)
+        self.is_capturing = feed.is_capturing
+        self.lease_until = feed.capture_lease_until
+        self.due = None
+
+        self.capture_times = []
+        for t in feed.capture_at_times or []:
+            try:
+                self.capture_times.append(datetime.strptime(t, "%H:%M:%S").time())
+            except ValueError:
+                log_warning(f"[DISPATCHER] Invalid time format in capture_at_times: {t}")
+
+    def next_due(self, now):
+        """Return when this feed should next be captured, or None if never."""
+        if self.holds_lease(now):
+            # Revisit when the lease runs out in case the job never reports back.
+            return self.lease_until
+
+        due = None
+        if self.mode == "schedule" and self.capture_times:
+            due = self._next_scheduled(now)
+        elif self.mode == "interval" and self.seconds_per_capture and self.seconds_per_capture > 0:
+            if self.last_capture_at is None:
+                due = now  # capture a new feed straight away; the phase grid applies from then on
+            else:
+                due = self.last_capture_at + timedelta(seconds=self.seconds_per_capture)
+                if DISPATCH_JITTER:
+                    due = self._nearest_slot(due, self.seconds_per_capture)
+
+        elif self.mode == "adaptive":
+            if self.last_capture_at is None:
+                due = now
+            else:
+                due = self.last_capture_at + timedelta(seconds=self.adaptive_seconds)
+
+        # dispatch_mode == "disabled" → no capture
+
+        if due is not None and self.last_failed_at is not None:
+            retry = FAILED_FEED_RETRY
+            if self.mode == "adaptive":
+                retry = adaptive.failure_backoff(self.failure_count, FAILED_FEED_RETRY, self.adaptive_max_seconds)
+            due = max(due, self.last_failed_at + timedelta(seconds=retry))
+        return due
+
+    def holds_lease(self, now):
+        """True while a dispatched capture is in flight and its lease is live."""
+        return bool(self.is_capturing and self.lease_until and self.lease_until > now)
+
+    # Interval feeds run on their own grid: times t where
+    # (t - epoch) % interval == phase * interval. Feeds sharing an interval
+    # get different phases, so their captures are spread across it instead
+    # of all landing in the same dispatcher tick.
+    def _slot_offset(self, when, interval):
+        seconds = (when - _EPOCH).total_seconds()
+        return (seconds - self.phase * interval) % interval
+
+    def _nearest_slot(self, when, interval):
+        offset = self._slot_offset(when, interval)
+        if offset <= interval / 2:
+            return when - timedelta(seconds=offset)
+        return when + timedelta(seconds=interval - offset)
+
+    def _next_scheduled(self, now):
+        wiggle = timedelta(seconds=SCHEDULE_WIGGLE_SECONDS)
+        last = self.last_capture_at
+        best = None
+        for day in (now.date(), now.date() + timedelta(days=1)):
+            for t in self.capture_times:
+                scheduled_dt = datetime.combine(day, t)
+                if scheduled_dt + wiggle < now:
+                    continue  # missed this slot
+                if last is not None and abs(last - scheduled_dt) <= wiggle:
+                    continue  # already captured for this slot
+                candidate = max(scheduled_dt, now)
+                if best is None or candidate < best:
+                    best = candidate
+        return best
+
+
+class DispatchSchedule:
+    """
+    Min-heap of next-due times. Heap entries are never removed in place;
+    an entry is stale once its feed has been rescheduled or dropped, and is
+    skipped when it reaches the top.
+    """
+
+    def __init__(self, host_max_in_flight=HOST_MAX_IN_FLIGHT, host_min_spacing=HOST_MIN_SPACING_SECONDS):
+        self.feeds = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self.host_max_in_flight = host_max_in_flight
+        self.host_min_spacing = timedelta(seconds=host_min_spacing)
+        self.in_flight = {}        # host -> uuids being captured
+        self._host_next_start = {}  # host -> earliest next start (min spacing)
+
+    def load(self, feeds, now):
+        self.feeds = {}
+        self._heap = []
+        self.in_flight = {}
+        for feed in feeds:
+            self.update(feed, now)
+
+    def update(self, feed, now):
+        sched = FeedSchedule(feed)
+        self.feeds[sched.uuid] = sched
+        if sched.holds_lease(now):
+            self.in_flight.setdefault(sched.host, set()).add(sched.uuid)
+        else:
+            self._release(sched.uuid)
+        self._push(sched, now)
+        return sched
+
+    def remove(self, feed_uuid):
+        self.feeds.pop(feed_uuid, None)
+        self._release(feed_uuid)
+
+    def _release(self, feed_uuid):
+        for host, uuids in list(self.in_flight.items()):
+            uuids.discard(feed_uuid)
+            if not uuids:
+                del self.in_flight[host]
+
+    def _host_available_at(self, host, now):
+        """When `host` can take another capture: `now` if it can right away."""
+        if self.host_max_in_flight and len(self.in_flight.get(host, ())) >= self.host_max_in_flight:
+            return now + timedelta(seconds=HOST_BUSY_RETRY_SECONDS)
+        return max(now, self._host_next_start.get(host, now))
+
+    def _push(self, sched, now):
+        sched.due = sched.next_due(now)
+        if sched.due is not None:
+            heapq.heappush(self._heap, (sched.due, next(self._counter), sched.uuid))
+
+    def _top(self):
+        while self._heap:
+            due, _, feed_uuid = self._heap[0]
+            sched = self.feeds.get(feed_uuid)
+            if sched is not None and sched.due == due:
+                return sched
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now):
+        """
+        Return every feed due at `now` whose host has capacity, marking them
+        as capturing. Feeds held back by their host's in-flight limit or
+        minimum spacing are pushed back to when the host should be free.
+        """
+        due = []
+        deferred = []
+        while True:
+            sched = self._top()
+            if sched is None or sched.due > now:
+                break
+            heapq.heappop(self._heap)
+
+            if sched.is_capturing:
+                # Lease ran out (or a pre-lease row was left capturing): the
+                # job died or hung, so free its host slot and capture again.
+                log_warning(f"[DISPATCHER] Capture lease expired for {sched.uuid}, reclaiming")
+                sched.is_capturing = False
+                self._release(sched.uuid)
+
+            available_at = self._host_available_at(sched.host, now)
+            if available_at > now:
+                sched.due = available_at
+                deferred.append(sched)
+                continue
+
+            sched.is_capturing = True
+            sched.lease_until = now + timedelta(seconds=CAPTURE_LEASE_SECONDS)
+            sched.due = sched.lease_until
+            heapq.heappush(self._heap, (sched.due, next(self._counter), sched.uuid))
+            self.in_flight.setdefault(sched.host, set()).add(sched.uuid)
+            if self.host_min_spacing:
+                self._host_next_start[sched.host] = now + self.host_min_spacing
+            due.append(sched)
+
+        for sched in deferred:
+            heapq.heappush(self._heap, (sched.due, next(self._counter), sched.uuid))
+        return due
+
+    def seconds_until_next(self, now):
+        sched = self._top()
+        if sched is None:
+            return None
+        return max(0.0, (sched.due - now).total_seconds())
+
+
+def _listen_for_feed_events(redis_conn, events):
+    """Forward feed events from Redis pub/sub onto the dispatcher's queue."""
+    first = True
+    while True:
+        try:
+            pubsub = redis_conn.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(FEED_EVENTS_CHANNEL)
+            if not first:
+                # Anything published while we were disconnected is lost.
+                events.put({"event": "reload"})
+            first = False
+            for message in pubsub.listen():
+                try:
+                    events.put(json.loads(message["data"]))
+                except (ValueError, TypeError):
+                    log_warning(f"[DISPATCHER] Ignoring malformed feed event: {message['data']!r}")
+        except Exception as e:
+            log_error(f"[DISPATCHER] Feed event subscription failed: {e}")
+            time.sleep(5)
+
+
+def _apply_event(schedule, event, now):
+    feed_uuid = event.get("uuid")
+    if event.get("event") == "reload" or not feed_uuid:
+        schedule.load(db.session.query(ExternalFeed).all(), now)
+        return
+
+    feed = db.session.query(ExternalFeed).filter_by(uuid=feed_uuid).first()
+    if feed is None:
+        schedule.remove(feed_uuid)
+    else:
+        schedule.update(feed, now)
+
+
+def capture_jobs(due):
+    """
+    Turn due feeds into (func, args) jobs: one capture_frame per feed, except
+    feeds whose decoder sets `batch_size` > 1, which are grouped by decoder
+    into capture_batch jobs of at most that many feeds.
+    """
+    jobs = []
+    batches = {}
+    for sched in due:
+        DecoderClass = get_decoder_by_name(sched.decoder_name)
+        batch_size = getattr(DecoderClass, "batch_size", 1) if DecoderClass else 1
+        if batch_size > 1:
+            batches.setdefault(sched.decoder_name, (batch_size, []))[1].append(sched.uuid)
+        else:
+            jobs.append((capture_frame, (sched.uuid,)))
+
+    for batch_size, uuids in batches.values():
+        for i in range(0, len(uuids), batch_size):
+            chunk = uuids[i:i + batch_size]
+            if len(chunk) == 1:
+                jobs.append((capture_frame, (chunk[0],)))
+            else:
+                jobs.append((capture_batch, (chunk,)))
+    return jobs
+
+
+def _count_by_decoder(due):
+    counts = {}
+    for sched in due:
+        counts[sched.decoder_name] = counts.get(sched.decoder_name, 0) + 1
+    return counts
+
+
+def _mark_capturing(uuids, lease_until, chunk_size=500):
+    for i in range(0, len(uuids), chunk_size):
+        db.session.query(ExternalFeed).filter(ExternalFeed.uuid.in_(uuids[i:i + chunk_size])).update(
+            {"is_capturing": True, "capture_lease_until": lease_until}, synchronize_session=False
+        )
+    db.session.commit()
+
+
+def _enqueue_housekeeping(queue, func):
+    """
+    Queue a housekeeping job under a fixed id, unless the previous one is
+    still waiting or running. Returns False if it was skipped.
+    """
+    job_id = f"feedalor-{func.__name__}"
+    try:
+        status = Job.fetch(job_id, connection=queue.connection).get_status()
+    except NoSuchJobError:
+        status = None
+    if status in (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED):
+        log_info(f"[DISPATCHER] {func.__name__} is still {status.value}, not queueing another")
+        return False
+    queue.enqueue(func, job_id=job_id, job_timeout=HOUSEKEEPING_JOB_TIMEOUT)
+    return True
+
+
+def dispatcher_loop(resync_interval=RESYNC_SECONDS):
     app = create_app()
     redis_conn = get_redis_connection()
     queue = Queue(QUEUE_NAME, connection=redis_conn)
+    housekeeping = Queue(HOUSEKEEPING_QUEUE_NAME, connection=redis_conn)
+
+    events = EventQueue()
+    threading.Thread(target=_listen_for_feed_events, args=(redis_conn, events), daemon=True).start()
 
     with app.app_context():
         log_info("[DISPATCHER] Starting dispatcher loop")
+        frame_index.ensure_index()
+
+        schedule = DispatchSchedule()
+        schedule.load(db.session.query(ExternalFeed).all(), datetime.utcnow())
+        db.session.commit()
+        next_resync = time.monotonic() + resync_interval
+        next_retention = time.monotonic()
+        next_reconcile = time.monotonic()
 
         while True:
+            tick_started = time.perf_counter()
             now = datetime.utcnow()
-            feeds = db.session.query(ExternalFeed).all()
-
-            for feed in feeds:
-                if feed.is_capturing:
-                    continue
-
-                should_capture = False
-
-                if feed.dispatch_mode == "schedule" and feed.capture_at_times:
-                    wiggle_seconds = 30
-                    last = feed.last_capture_at or datetime.min
-
-                    for t in feed.capture_at_times:
-                        try:
-                            scheduled_time = datetime.strptime(t, "%H:%M:%S").time()
-                            scheduled_dt = now.replace(hour=scheduled_time.hour, minute=scheduled_time.minute, second=scheduled_time.second, microsecond=0)
-
-                            delta = abs((now - scheduled_dt).total_seconds())
-                            recent = abs((last - scheduled_dt).total_seconds())
+            due = schedule.pop_due(now)
+            if due:
+                _mark_capturing([sched.uuid for sched in due], due[0].lease_until)
+                jobs = capture_jobs(due)
+                for func, args in jobs:
+                    queue.enqueue(func, *args, ttl=CAPTURE_QUEUE_TTL, job_timeout=CAPTURE_JOB_TIMEOUT)
+                log_info(f"[DISPATCHER] Scheduled capture for {len(due)} feeds in {len(jobs)} jobs")
 
-                            if delta <= wiggle_seconds and recent > wiggle_seconds:
-                                should_capture = True
-                                break
-                        except ValueError:
-                            log_warning(f"[DISPATCHER] Invalid time format in capture_at_times: {t}")
+            if time.monotonic() >= next_retention:
+                _enqueue_housekeeping(housekeeping, prune_all_feeds)
+                next_retention = time.monotonic() + RETENTION_INTERVAL_SECONDS
 
+            if time.monotonic() >= next_reconcile:
+                _enqueue_housekeeping(housekeeping, reconcile_storage)
+                next_reconcile = time.monotonic() + STORAGE_RECONCILE_SECONDS
 
-                elif feed.dispatch_mode == "interval" and feed.seconds_per_capture and feed.seconds_per_capture > 0:
-                    last = feed.last_capture_at or datetime.min
-                    next_capture_due = last + timedelta(seconds=feed.seconds_per_capture)
-                    should_capture = now >= next_capture_due
+            # Sleep until the next deadline, a feed event, a housekeeping job or the periodic resync.
+            timeout = resync_interval
+            wait = schedule.seconds_until_next(datetime.utcnow())
+            if wait is not None:
+                timeout = min(timeout, wait)
+            timeout = min(timeout, next_resync - time.monotonic(), next_retention - time.monotonic(),
+                          next_reconcile - time.monotonic())
+            timeout = max(0.0, timeout)
 
-                # feed.dispatch_mode == "disabled" → no capture
+            tick_seconds = time.perf_counter() - tick_started
+            pending = []
+            try:
+                pending.append(events.get(timeout=timeout))
+                while True:
+                    pending.append(events.get_nowait())
+            except Empty:
+                pass
+            resumed = time.perf_counter()
 
-                if should_capture:
-                    feed.is_capturing = True
-                    queue.enqueue(capture_frame, feed.uuid)
-                    log_info(f"[DISPATCHER] Scheduled capture for {feed.uuid}")
+            if pending:
+                # Each event reloads its feed row; expire cached rows first.
+                db.session.expire_all()
+                now = datetime.utcnow()
+                for event in pending:
+                    _apply_event(schedule, event, now)
+                db.session.commit()
 
+            if time.monotonic() >= next_resync:
+                db.session.expire_all()
+                schedule.load(db.session.query(ExternalFeed).all(), datetime.utcnow())
+                db.session.commit()
+                next_resync = time.monotonic() + resync_interval
 
-            db.session.commit()
-            time.sleep(interval)
+            # Time spent working this tick, excluding the wait for the next deadline.
+            tick_seconds += time.perf_counter() - resumed
+            metrics.record(
+                observations=[("feedalor_dispatcher_tick_seconds", {}, tick_seconds)],
+                counters=[("feedalor_dispatched_total", {"decoder": decoder}, count)
+                          for decoder, count in _count_by_decoder(due).items()],
+                gauges=[("feedalor_dispatcher_in_flight", {},
+                         sum(len(uuids) for uuids in schedule.in_flight.values()))],
+            )
 
 def start_dispatcher():
-    dispatcher_loop()
\ No newline at end of file
+    dispatcher_loop()
@@ -0,0 +1,143 @@
+# app/tasks/retention.py
+#
+# Batched retention ("janitor") task. Captures only write; this job, queued
+# by the dispatcher every RETENTION_INTERVAL_SECONDS, applies the retention
+# rules for every feed and an optional global disk budget, and trims the
+# capture_runs history to CAPTURE_RUN_HISTORY rows.
+
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models import db, ExternalFeed, FrameRecord
+from app.utils import frame_index, capture_runs
+from app.utils.logger import log_info, log_error
+
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "60"))
+STORAGE_BUDGET_MB = int(os.getenv("STORAGE_BUDGET_MB", "0"))  # 0 = no global budget
+AGE_WIGGLE_FACTOR = 1.5
+
+
+def uses_age_rule(feed):
+    # Schedule, adaptive and change-gated feeds store frames at irregular times.
+    return feed.dispatch_mode not in ("schedule", "adaptive") and not feed.change_threshold
+
+
+def max_frame_age(feed):
+    """Seconds an interval feed keeps frames for, measured back from its newest frame."""
+    return AGE_WIGGLE_FACTOR * (feed.history_length or 1) * (feed.seconds_per_capture or 60)
+
+
+def expired_frames(feed, frames):
+    """
+    Return the frames that `feed`'s retention rules no longer keep.
+    `frames` must be newest first.
+      - keep at most `history_length` frames
+      - interval feeds also drop frames more than
+        1.5 * history_length * seconds_per_capture older than their newest
+        frame, unless change gating is on (gated and adaptive feeds store
+        frames at irregular times)
+      - the newest frame is always kept, so a feed that stops capturing
+        (disabled, or its source is down) keeps the history it has
+    """
+    if not frames:
+        return []
+    history_length = feed.history_length or 1
+    expired = frames[history_length:]
+
+    if uses_age_rule(feed):
+        cutoff = frames[0].captured_at - timedelta(seconds=max_frame_age(feed))
+        expired += [f for f in frames[1:history_length] if f.captured_at < cutoff]
+    return expired
+
+
+def _indexed_bytes():
+    """
+    Bytes held by indexed frames. Deduplicated frames are hardlinks that
+    share their source's content hash, so each (feed, hash) is counted once.
+    """
+    unhashed = (db.session.query(func.coalesce(func.sum(FrameRecord.size), 0))
+                .filter(FrameRecord.content_hash.is_(None)).scalar())
+    per_hash = (db.session.query(func.max(FrameRecord.size).label("size"))
+                .filter(FrameRecord.content_hash.isnot(None))
+                .group_by(FrameRecord.feed_uuid, FrameRecord.content_hash).subquery())
+    hashed = db.session.query(func.coalesce(func.sum(per_hash.c.size), 0)).scalar()
+    return unhashed + hashed
+
+
+def _budget_evictions(budget_bytes, newest_by_feed):
+    """
+    Oldest-first eviction across all feeds until the indexed total fits in
+    `budget_bytes`. Each feed's newest frame is never evicted. A hardlinked
+    file only counts as freed once every one of its links is evicted.
+    """
+    total = _indexed_bytes()
+    if total <= budget_bytes:
+        return []
+
+    evicted = []
+    links_evicted = {}  # (st_dev, st_ino) -> links of that file evicted so far
+    query = FrameRecord.query.order_by(FrameRecord.captured_at.asc(), FrameRecord.id.asc())
+    for record in query.yield_per(500):
+        if total <= budget_bytes:
+            break
+        if record.captured_at == newest_by_feed.get(record.feed_uuid):
+            continue
+        evicted.append(record)
+        try:
+            stat = os.stat(frame_index.frame_path(record))
+        except OSError:
+            total -= record.size or 0
+            continue
+        key = (stat.st_dev, stat.st_ino)
+        links_evicted[key] = links_evicted.get(key, 0) + 1
+        if links_evicted[key] >= stat.st_nlink:
+            total -= record.size or 0
+    return evicted
+
+
+def prune_all_feeds(budget_mb=STORAGE_BUDGET_MB):
+    from app.tasks.capture import get_app
+
+    app = get_app()
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            feeds = {f.uuid: f for f in ExternalFeed.query.all()}
+            stats = frame_index.frame_stats()
+
+            # Only feeds whose count or oldest frame breaks a rule are loaded.
+            to_remove = []
+            for feed_uuid, (count, oldest, newest) in stats.items():
+                feed = feeds.get(feed_uuid)
+                if feed is None:
+                    continue  # orphaned stills are left for the engineering page to report
+                too_old = uses_age_rule(feed) and oldest < newest - timedelta(seconds=max_frame_age(feed))
+                if count > (feed.history_length or 1) or too_old:
+                    frames = frame_index.list_frames(feed_uuid, newest_first=True)
+                    to_remove += expired_frames(feed, frames)
+
+            reclaimed = frame_index.remove_frames(to_remove) if to_remove else 0
+            db.session.flush()
+            rule_count = len(to_remove)
+
+            if budget_mb > 0:
+                newest_by_feed = {uuid: newest for uuid, (_, _, newest) in stats.items()}
+                over_budget = _budget_evictions(budget_mb * 1024 * 1024, newest_by_feed)
+                reclaimed += frame_index.remove_frames(over_budget)
+                to_remove += over_budget
+
+            capture_runs.trim_runs()
+            db.session.commit()
+
+            if to_remove:
+                log_info(
+                    f"[RETENTION] Pruned {len(to_remove)} frames "
+                    f"({rule_count} by retention rules, {len(to_remove) - rule_count} by disk budget), "
+                    f"reclaimed {reclaimed} bytes"
+                )
+            return {"frames_removed": len(to_remove), "bytes_reclaimed": reclaimed}
+
+        except Exception as e:
+            db.session.rollback()
+            log_error(f"[RETENTION] Pruning failed: {e}")
+            raise
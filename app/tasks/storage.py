@@ -0,0 +1,23 @@
+# app/tasks/storage.py
+#
+# Background storage reconcile, queued by the dispatcher every
+# STORAGE_RECONCILE_SECONDS. This is the only place static/ is walked;
+# /api/health and the engineering page read the counters it maintains.
+
+import os
+from app.models import db
+from app.utils import storage_stats
+from app.utils.logger import log_error
+
+
+def reconcile_storage():
+    from app.tasks.capture import get_app
+
+    app = get_app()
+    with app.app_context():
+        try:
+            return storage_stats.reconcile(os.path.join(app.root_path, "static"))
+        except Exception as e:
+            db.session.rollback()
+            log_error(f"[STORAGE] Reconcile failed: {e}")
+            raise
@@ -0,0 +1,41 @@
+# app/tasks/worker.py
+"""
+Warm RQ worker for capture jobs.
+
+The stock `rq worker` forks a fresh process for every job, so each capture
+rebuilds the Flask app, the SQLAlchemy engine and the decoder registry and
+throws away any pooled decoder sessions. This worker builds all of that once
+and runs jobs in-process.
+
+    PYTHONPATH=/app python3 -m app.tasks.worker
+
+Retention and storage reconcile jobs have their own queue, served by a
+second worker so they never delay captures:
+
+    PYTHONPATH=/app python3 -m app.tasks.worker housekeeping
+"""
+import sys
+from rq import Queue, SimpleWorker
+from app.tasks.capture import get_app
+from app.tasks.dispatcher import QUEUE_NAME, HOUSEKEEPING_QUEUE_NAME
+from app.plugins.sessions import session_pool
+from app.utils.redis_conn import get_redis_connection
+from app.utils.logger import log_info
+
+
+def main(queue_name=QUEUE_NAME):
+    app = get_app()  # Flask app, DB engine and decoder registry, built once
+    redis_conn = get_redis_connection()
+    queue = Queue(queue_name, connection=redis_conn)
+
+    log_info(f"[WORKER] Warm worker started for queue {queue_name} ({app.name})")
+    worker = SimpleWorker([queue], connection=redis_conn)
+    try:
+        worker.work()
+    finally:
+        session_pool.close_all()
+        log_info("[WORKER] Warm worker stopped")
+
+
+if __name__ == "__main__":
+    main(HOUSEKEEPING_QUEUE_NAME if sys.argv[1:] == ["housekeeping"] else QUEUE_NAME)
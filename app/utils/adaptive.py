@@ -0,0 +1,47 @@
+# app/utils/adaptive.py
+#
+# Interval arithmetic for dispatch_mode "adaptive". After each capture the
+# feed's interval is halved when the frame changed a lot and stretched when
+# it barely changed, within the feed's min/max bounds. Failing feeds back
+# off exponentially from FAILED_FEED_RETRY up to the max.
+
+import os
+
+ADAPTIVE_MIN_SECONDS = int(os.getenv("ADAPTIVE_MIN_SECONDS", "10"))
+ADAPTIVE_MAX_SECONDS = int(os.getenv("ADAPTIVE_MAX_SECONDS", "3600"))
+ADAPTIVE_CHANGE_HIGH = float(os.getenv("ADAPTIVE_CHANGE_HIGH", "8"))   # speed up at/above
+ADAPTIVE_CHANGE_LOW = float(os.getenv("ADAPTIVE_CHANGE_LOW", "1"))     # slow down below
+ADAPTIVE_SPEEDUP = 0.5
+ADAPTIVE_SLOWDOWN = 1.5
+MAX_BACKOFF_DOUBLINGS = 16
+
+
+def bounds(min_seconds, max_seconds):
+    low = min_seconds or ADAPTIVE_MIN_SECONDS
+    high = max(max_seconds or ADAPTIVE_MAX_SECONDS, low)
+    return low, high
+
+
+def current_interval(adaptive_seconds, seconds_per_capture, min_seconds, max_seconds):
+    low, high = bounds(min_seconds, max_seconds)
+    interval = adaptive_seconds or seconds_per_capture or low
+    return min(max(interval, low), high)
+
+
+def next_interval(interval, change_score, min_seconds, max_seconds):
+    """New interval after a capture that scored `change_score` (None = nothing to compare)."""
+    low, high = bounds(min_seconds, max_seconds)
+    if change_score is not None:
+        if change_score >= ADAPTIVE_CHANGE_HIGH:
+            interval *= ADAPTIVE_SPEEDUP
+        elif change_score < ADAPTIVE_CHANGE_LOW:
+            interval *= ADAPTIVE_SLOWDOWN
+    return min(max(interval, low), high)
+
+
+def failure_backoff(failure_count, base_seconds, max_seconds):
+    """Seconds to wait after the `failure_count`-th consecutive failure."""
+    if not failure_count:
+        return base_seconds
+    doublings = min(failure_count - 1, MAX_BACKOFF_DOUBLINGS)
+    return min(base_seconds * (2 ** doublings), max_seconds)
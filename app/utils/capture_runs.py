@@ -0,0 +1,125 @@
+# app/utils/capture_runs.py
+#
+# Per-attempt capture history (the capture_runs table) and the performance
+# report the engineering page builds from it. Rows are added inside the
+# capture job's own commit, so recording costs no extra transaction.
+
+import math
+import os
+from datetime import datetime, timedelta
+from app.models import db, CaptureRun
+
+CAPTURE_RUN_HISTORY = int(os.getenv("CAPTURE_RUN_HISTORY", "50000"))
+CAPTURE_REPORT_HOURS = float(os.getenv("CAPTURE_REPORT_HOURS", "24"))
+ERROR_MAX_LENGTH = 300
+
+# Report columns: CaptureRun attribute -> label
+STAGES = [
+    ("queue_wait_ms", "queue wait"),
+    ("decode_ms", "decode"),
+    ("encode_ms", "encode"),
+    ("write_ms", "write"),
+    ("total_ms", "total"),
+]
+FAILED_RESULTS = ("failed", "timeout")
+
+
+def add_run(feed, started_at, result, timings, queue_wait=None, size=None, error=None):
+    """
+    Append a CaptureRun for one attempt. `timings` are the per-stage seconds
+    from process_frame/capture_frame. The caller commits.
+    """
+    def ms(*stages):
+        return round(sum(timings.get(s, 0.0) for s in stages) * 1000, 1)
+
+    db.session.add(CaptureRun(
+        feed_uuid=feed.uuid,
+        decoder_name=feed.decoder_name,
+        started_at=started_at,
+        result=result,
+        queue_wait_ms=round(queue_wait * 1000, 1) if queue_wait is not None else None,
+        decode_ms=ms("decode") if "decode" in timings else None,
+        encode_ms=ms("encode") if "encode" in timings else None,
+        write_ms=ms("write", "renditions") if "write" in timings else None,
+        total_ms=ms(*[s for s in timings if s != "commit"]) if timings else None,
+        bytes=size,
+        error=str(error)[:ERROR_MAX_LENGTH] if error else None,
+    ))
+
+
+def trim_runs(keep=CAPTURE_RUN_HISTORY):
+    """Delete all but the newest `keep` runs. Returns the number deleted. The caller commits."""
+    max_id = db.session.query(db.func.max(CaptureRun.id)).scalar()
+    if max_id is None or max_id <= keep:
+        return 0
+    return CaptureRun.query.filter(CaptureRun.id <= max_id - keep).delete(synchronize_session=False)
+
+
+def remove_feed(feed_uuid):
+    """Drop a deleted feed's runs. The caller commits."""
+    CaptureRun.query.filter_by(feed_uuid=feed_uuid).delete(synchronize_session=False)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list, or None if it is empty."""
+    if not values:
+        return None
+    rank = math.ceil(pct / 100 * len(values)) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+def _summarise(runs):
+    total = sorted(r.total_ms for r in runs if r.total_ms is not None)
+    decode = [r.decode_ms for r in runs if r.decode_ms is not None]
+    sizes = [r.bytes for r in runs if r.bytes]
+    failures = sum(1 for r in runs if r.result in FAILED_RESULTS)
+    return {
+        "runs": len(runs),
+        "failures": failures,
+        "failure_pct": round(100.0 * failures / len(runs), 1) if runs else 0.0,
+        "p50_ms": percentile(total, 50),
+        "p95_ms": percentile(total, 95),
+        "p99_ms": percentile(total, 99),
+        "mean_decode_ms": round(sum(decode) / len(decode), 1) if decode else None,
+        "mean_bytes": int(sum(sizes) / len(sizes)) if sizes else None,
+    }
+
+
+def performance_report(hours=CAPTURE_REPORT_HOURS):
+    """
+    Summaries of the capture runs of the last `hours`: per feed and per
+    decoder (slowest p95 first), and p50/p95/p99 of each stage.
+    """
+    since = datetime.utcnow() - timedelta(hours=hours)
+    runs = (db.session.query(CaptureRun.feed_uuid, CaptureRun.decoder_name, CaptureRun.result,
+                             *[getattr(CaptureRun, col) for col, _ in STAGES], CaptureRun.bytes)
+            .filter(CaptureRun.started_at >= since)
+            .all())
+
+    by_feed, by_decoder = {}, {}
+    for run in runs:
+        by_feed.setdefault(run.feed_uuid, []).append(run)
+        by_decoder.setdefault(run.decoder_name or "none", []).append(run)
+
+    def ranked(groups, key):
+        rows = [dict(_summarise(group), **{key: name}) for name, group in groups.items()]
+        return sorted(rows, key=lambda row: row["p95_ms"] or 0, reverse=True)
+
+    stages = []
+    for col, label in STAGES:
+        values = sorted(getattr(r, col) for r in runs if getattr(r, col) is not None)
+        stages.append({
+            "stage": label,
+            "samples": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+        })
+
+    return {
+        "since": since,
+        "runs": len(runs),
+        "feeds": ranked(by_feed, "feed_uuid"),
+        "decoders": ranked(by_decoder, "decoder_name"),
+        "stages": stages,
+    }
@@ -0,0 +1,90 @@
+# app/utils/change_detect.py
+#
+# Scene-change gating for capture_frame. Each stored frame leaves a small
+# grayscale signature in Redis; the next capture is compared with it using
+# the mean absolute pixel difference (0-255). Frames scoring below the
+# feed's change_threshold are not encoded or stored, unless the feed's
+# keyframe_minutes have passed since the last stored frame.
+
+import os
+from datetime import timedelta
+import cv2
+import numpy as np
+from app.utils.redis_conn import get_redis_connection
+from app.utils.logger import log_warning
+
+SIGNATURE_SIZE = (64, 48)  # width, height
+SIGNATURE_TTL_SECONDS = int(os.getenv("CHANGE_SIGNATURE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_redis = None
+_local_signatures = {}  # used when Redis is unavailable
+
+
+def signature(frame):
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def change_score(previous, current):
+    """Mean absolute difference of two signatures, 0 (identical) to 255."""
+    return float(np.abs(previous.astype(np.int16) - current.astype(np.int16)).mean())
+
+
+def _key(feed_uuid):
+    return f"feedalor:change-sig:{feed_uuid}"
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = get_redis_connection()
+    return _redis
+
+
+def load_signature(feed_uuid):
+    try:
+        raw = _get_redis().get(_key(feed_uuid))
+    except Exception as e:
+        log_warning(f"[CHANGE] Redis unavailable, using local signature: {e}")
+        return _local_signatures.get(feed_uuid)
+    if raw is None or len(raw) != SIGNATURE_SIZE[0] * SIGNATURE_SIZE[1]:
+        return None
+    return np.frombuffer(raw, dtype=np.uint8).reshape(SIGNATURE_SIZE[1], SIGNATURE_SIZE[0])
+
+
+def save_signature(feed_uuid, sig):
+    _local_signatures[feed_uuid] = sig
+    try:
+        _get_redis().set(_key(feed_uuid), sig.tobytes(), ex=SIGNATURE_TTL_SECONDS)
+    except Exception as e:
+        log_warning(f"[CHANGE] Failed to save signature for {feed_uuid}: {e}")
+
+
+def clear_signature(feed_uuid):
+    _local_signatures.pop(feed_uuid, None)
+    try:
+        _get_redis().delete(_key(feed_uuid))
+    except Exception:
+        pass
+
+
+def detect_change(feed, frame, last_stored_at, now):
+    """
+    Decide whether `frame` should be stored. Returns (store, score, sig);
+    score is None when there was nothing to compare with. Without a
+    change_threshold every frame is stored, but the score is still
+    measured (adaptive feeds use it). Call save_signature(feed.uuid, sig)
+    once the frame has been stored.
+    """
+    sig = signature(frame)
+    previous = load_signature(feed.uuid)
+    if previous is None or last_stored_at is None:
+        return True, None, sig
+
+    score = change_score(previous, sig)
+    if not feed.change_threshold or score >= feed.change_threshold:
+        return True, score, sig
+
+    if feed.keyframe_minutes and now - last_stored_at >= timedelta(minutes=feed.keyframe_minutes):
+        return True, score, sig
+    return False, score, sig
@@ -0,0 +1,95 @@
+# app/utils/event_stream.py
+#
+# Fans feed events out to browser clients. One background thread per web
+# process subscribes to FEED_EVENTS_CHANNEL and copies each message into the
+# queue of every connected /api/events stream, so the number of dashboards
+# doesn't change the number of Redis connections.
+
+import json
+import os
+import queue
+import threading
+import time
+from app.utils.redis_conn import get_redis_connection
+from app.utils.feed_events import FEED_EVENTS_CHANNEL
+from app.utils.logger import log_info, log_warning
+
+EVENT_STREAM_HEARTBEAT_SECONDS = int(os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+SUBSCRIBER_QUEUE_SIZE = 256
+
+_subscribers = set()
+_lock = threading.Lock()
+_relay_thread = None
+
+
+def _relay():
+    while True:
+        try:
+            pubsub = get_redis_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(FEED_EVENTS_CHANNEL)
+            log_info(f"[EVENT STREAM] Relaying {FEED_EVENTS_CHANNEL}")
+            for message in pubsub.listen():
+                try:
+                    payload = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                with _lock:
+                    targets = list(_subscribers)
+                for q in targets:
+                    try:
+                        q.put_nowait(payload)
+                    except queue.Full:
+                        # A stalled client resyncs from /api/feeds on reconnect.
+                        pass
+        except Exception as e:
+            log_warning(f"[EVENT STREAM] Redis subscription lost, retrying: {e}")
+            time.sleep(1)
+
+
+def subscribe():
+    """Register a client and return the queue its events are delivered to."""
+    global _relay_thread
+    q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _lock:
+        _subscribers.add(q)
+        if _relay_thread is None:
+            _relay_thread = threading.Thread(target=_relay, name="event-stream-relay", daemon=True)
+            _relay_thread.start()
+    return q
+
+
+def unsubscribe(q):
+    with _lock:
+        _subscribers.discard(q)
+
+
+def subscriber_count():
+    with _lock:
+        return len(_subscribers)
+
+
+def format_sse(payload):
+    return f"event: {payload.get('event', 'message')}\ndata: {json.dumps(payload)}\n\n"
+
+
+def event_stream(feed_uuids=None):
+    """
+    Generator of Server-Sent Events for one client. Only events for
+    `feed_uuids` are sent when given; events without a uuid (reload) always are.
+    """
+    q = subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                payload = q.get(timeout=EVENT_STREAM_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream.
+                yield ": keepalive\n\n"
+                continue
+            uuid = payload.get("uuid")
+            if feed_uuids and uuid and uuid not in feed_uuids:
+                continue
+            yield format_sse(payload)
+    finally:
+        unsubscribe(q)
@@ -0,0 +1,22 @@
+# app/utils/feed_events.py
+import json
+from app.utils.redis_conn import get_redis_connection
+from app.utils.logger import log_warning
+
+# Published on every feed change and capture completion:
+#   {"event": "changed" | "deleted" | "captured" | "reload", "uuid": <feed uuid or null>}
+# "captured" also carries "ok" and, on success, "captured_at" (ISO, UTC).
+# The dispatcher listens for these, and /api/events relays them to browsers.
+FEED_EVENTS_CHANNEL = "feedalor:feed-events"
+
+_redis = None
+
+def publish_feed_event(event, feed_uuid=None, **extra):
+    global _redis
+    try:
+        if _redis is None:
+            _redis = get_redis_connection()
+        payload = {"event": event, "uuid": feed_uuid, **extra}
+        _redis.publish(FEED_EVENTS_CHANNEL, json.dumps(payload))
+    except Exception as e:
+        log_warning(f"[EVENTS] Failed to publish {event} for {feed_uuid}: {e}")
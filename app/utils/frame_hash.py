@@ -0,0 +1,27 @@
+# app/utils/frame_hash.py
+#
+# Frame fingerprints for deduplication:
+#   content_hash    - exact: SHA-1 of the decoded pixels and shape
+#   perceptual_hash - 64-bit difference hash (dHash); frames whose hashes
+#                     differ in only a few bits look the same to a viewer
+
+import hashlib
+import cv2
+import numpy as np
+
+
+def content_hash(frame):
+    digest = hashlib.sha1(str(frame.shape).encode())
+    digest.update(np.ascontiguousarray(frame).data)
+    return digest.hexdigest()
+
+
+def perceptual_hash(frame):
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hamming(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
@@ -0,0 +1,197 @@
+# app/utils/frame_index.py
+#
+# Index of stored history stills, kept in the frame_records table.
+# The capture task adds a row per still and the pruning code removes them,
+# so readers can count, order and look up frames without listing directories.
+#
+# Rebuild from disk (e.g. after copying stills in by hand):
+#   PYTHONPATH=/app python3 -m app.utils.frame_index
+
+import os
+import re
+import cv2
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func
+from app.models import db, FrameRecord
+from app.utils.logger import log_info, log_warning
+from app.utils import storage_stats, frame_hash
+
+# History stills are named <uuid>_<timestamp>.jpg. Microseconds keep two
+# captures in the same second apart; older files have whole seconds only.
+FILENAME_TIME_FORMAT = "%Y%m%d_%H%M%S_%f"
+_FILENAME_RE = re.compile(r"^(?P<uuid>.+)_(?P<ts>\d{8}_\d{6}(?P<us>_\d{6})?)\.jpg$")
+
+
+def stills_root():
+    return os.path.join(current_app.root_path, "static", "stills")
+
+
+def frame_path(record):
+    return os.path.join(stills_root(), record.feed_uuid, record.filename)
+
+
+def add_frame(feed_uuid, filename, captured_at, size, content_hash=None, perceptual_hash=None):
+    """Record a newly written still. The caller commits."""
+    record = FrameRecord(feed_uuid=feed_uuid, filename=filename, captured_at=captured_at, size=size,
+                         content_hash=content_hash, perceptual_hash=perceptual_hash)
+    db.session.add(record)
+    storage_stats.adjust(feed_uuid, 1, size)
+    return record
+
+
+def frame_count(feed_uuid):
+    return FrameRecord.query.filter_by(feed_uuid=feed_uuid).count()
+
+
+def _ordering(newest_first):
+    if newest_first:
+        return FrameRecord.captured_at.desc(), FrameRecord.id.desc()
+    return FrameRecord.captured_at.asc(), FrameRecord.id.asc()
+
+
+def get_frame(feed_uuid, index, newest_first=True):
+    """Return the frame at `index` (0 = newest by default), or None."""
+    if index < 0:
+        return None
+    return (FrameRecord.query.filter_by(feed_uuid=feed_uuid)
+            .order_by(*_ordering(newest_first))
+            .offset(index).limit(1).first())
+
+
+def list_frames(feed_uuid, newest_first=False, start=None, end=None):
+    """Frames for a feed, optionally limited to start <= captured_at <= end."""
+    query = FrameRecord.query.filter_by(feed_uuid=feed_uuid)
+    if start is not None:
+        query = query.filter(FrameRecord.captured_at >= start)
+    if end is not None:
+        query = query.filter(FrameRecord.captured_at <= end)
+    return query.order_by(*_ordering(newest_first)).all()
+
+
+def frame_stats():
+    """Return {feed_uuid: (count, oldest, newest)} for every indexed feed in one query."""
+    rows = (db.session.query(FrameRecord.feed_uuid,
+                             func.count(FrameRecord.id),
+                             func.min(FrameRecord.captured_at),
+                             func.max(FrameRecord.captured_at))
+            .group_by(FrameRecord.feed_uuid).all())
+    return {uuid: (count, oldest, newest) for uuid, count, oldest, newest in rows}
+
+
+def remove_frames(records):
+    """Delete the files and rows for `records`. Returns bytes reclaimed. The caller commits."""
+    reclaimed = 0
+    removed_by_feed = {}
+    for record in records:
+        path = frame_path(record)
+        try:
+            # Deduplicated frames are hardlinks; only the last link frees space.
+            shared = os.stat(path).st_nlink > 1
+            os.remove(path)
+            if not shared:
+                reclaimed += record.size or 0
+            counts = removed_by_feed.setdefault(record.feed_uuid, [0, 0])
+            counts[0] += 1
+            counts[1] += record.size or 0
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log_warning(f"[FRAME INDEX] Failed to remove {path}: {e}")
+            continue
+        db.session.delete(record)
+
+    for feed_uuid, (files, size) in removed_by_feed.items():
+        storage_stats.adjust(feed_uuid, -files, -size)
+    return reclaimed
+
+
+def remove_feed(feed_uuid):
+    """Drop every index row and storage counter for a feed. The caller removes the files and commits."""
+    FrameRecord.query.filter_by(feed_uuid=feed_uuid).delete(synchronize_session=False)
+    storage_stats.drop(feed_uuid)
+
+
+def parse_frame_filename(filename):
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        return None, None
+    try:
+        fmt = FILENAME_TIME_FORMAT if match.group("us") else "%Y%m%d_%H%M%S"
+        return match.group("uuid"), datetime.strptime(match.group("ts"), fmt)
+    except ValueError:
+        return None, None
+
+
+def _file_hashes(path, stat, hashes_by_inode):
+    """(content_hash, perceptual_hash) of a stored still; hardlinks of one file are decoded once."""
+    key = (stat.st_dev, stat.st_ino)
+    if key not in hashes_by_inode:
+        frame = cv2.imread(path)
+        hashes_by_inode[key] = (None, None) if frame is None \
+            else (frame_hash.content_hash(frame), frame_hash.perceptual_hash(frame))
+    return hashes_by_inode[key]
+
+
+def rebuild_index(feed_uuids=None):
+    """
+    Re-create index rows from the files on disk, for all feeds or the given
+    ones. Returns the number of frames indexed. Storage counters are left to
+    the next storage reconcile, which measures the same files.
+
+    Hashes are taken from the decoded stills, but only for each feed's newest
+    frame (what the next capture dedups against) and for hardlinked
+    duplicates (so the disk budget counts them once). JPEG decoding isn't
+    bit-exact with the captured frame. So with dedup_tolerance 0, the first
+    capture after a rebuild is stored in full.
+    """
+    root = stills_root()
+    if feed_uuids is None:
+        feed_uuids = [d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))] \
+            if os.path.isdir(root) else []
+        FrameRecord.query.delete(synchronize_session=False)
+    else:
+        FrameRecord.query.filter(FrameRecord.feed_uuid.in_(feed_uuids)).delete(synchronize_session=False)
+
+    indexed = 0
+    for feed_uuid in feed_uuids:
+        feed_dir = os.path.join(root, feed_uuid)
+        if not os.path.isdir(feed_dir):
+            continue
+        found = []
+        with os.scandir(feed_dir) as entries:
+            for entry in entries:
+                file_uuid, captured_at = parse_frame_filename(entry.name)
+                if file_uuid != feed_uuid or not entry.is_file():
+                    continue
+                found.append((captured_at, entry.name, entry.stat()))
+        if not found:
+            continue
+
+        newest = max(found, key=lambda f: (f[0], f[1]))[1]
+        hashes_by_inode = {}
+        for captured_at, filename, stat in found:
+            hashes = (None, None)
+            if filename == newest or stat.st_nlink > 1:
+                hashes = _file_hashes(os.path.join(feed_dir, filename), stat, hashes_by_inode)
+            db.session.add(FrameRecord(feed_uuid=feed_uuid, filename=filename, captured_at=captured_at,
+                                       size=stat.st_size, content_hash=hashes[0], perceptual_hash=hashes[1]))
+            indexed += 1
+
+    db.session.commit()
+    log_info(f"[FRAME INDEX] Rebuilt index: {indexed} frames across {len(feed_uuids)} feeds")
+    return indexed
+
+
+def ensure_index():
+    """Build the index from disk if it has never been populated."""
+    if db.session.query(FrameRecord.id).first() is None:
+        rebuild_index()
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    with create_app().app_context():
+        count = rebuild_index()
+        print(f"Indexed {count} frames.")
@@ -0,0 +1,75 @@
+# app/utils/http_cache.py
+#
+# Conditional responses for captured frames. Validators come from the
+# capture timestamp held in the database, so a 304 never touches the disk.
+
+from datetime import datetime, timedelta, timezone
+from flask import request, send_file, Response
+
+
+def frame_etag(*parts):
+    return "-".join(str(p) for p in parts)
+
+
+def record_etag(record, *extra):
+    """ETag for a stored frame's index row; `extra` distinguishes renditions of it."""
+    return frame_etag(record.feed_uuid, *extra, record.id,
+                      record.captured_at.strftime("%Y%m%d%H%M%S"), record.size)
+
+
+def seconds_until_next_capture(feed, now=None):
+    """
+    How long the current frame stays current; 0 if we can't predict it.
+    Uses the dispatcher's own due time, which for jittered feeds can come
+    before last_capture_at + seconds_per_capture.
+    """
+    if feed is None or feed.dispatch_mode != "interval" or not feed.seconds_per_capture \
+            or feed.last_capture_at is None or feed.is_capturing:
+        return 0
+    from app.tasks.dispatcher import FeedSchedule  # the dispatcher imports the app
+
+    now = now or datetime.utcnow()
+    next_capture = FeedSchedule(feed).next_due(now)
+    if next_capture is None:
+        return 0
+    return max(0, int((next_capture - now).total_seconds()))
+
+
+def _as_utc(captured_at):
+    return captured_at.replace(tzinfo=timezone.utc, microsecond=0) if captured_at else None
+
+
+def _apply_cache_headers(response, etag, captured_at, max_age):
+    response.set_etag(etag)
+    if captured_at:
+        response.last_modified = _as_utc(captured_at)
+    response.cache_control.public = True
+    if max_age > 0:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, captured_at, max_age):
+    """
+    Return an empty 304 response if the client's cached copy matches, else
+    None. Call this before resolving or stat-ing the file.
+    `captured_at` is naive UTC.
+    """
+    if request.if_none_match:
+        matches = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        last_modified = _as_utc(captured_at)
+        matches = bool(since and last_modified and last_modified <= since)
+
+    if not matches:
+        return None
+    return _apply_cache_headers(Response(status=304), etag, captured_at, max_age)
+
+
+def send_frame(path, etag, captured_at, max_age, mimetype="image/jpeg"):
+    """Send `path` with a strong ETag, Last-Modified and Cache-Control."""
+    response = send_file(path, mimetype=mimetype, etag=False, conditional=False)
+    return _apply_cache_headers(response, etag, captured_at, max_age)
@@ -0,0 +1,105 @@
+# app/utils/http_client.py
+#
+# Shared HTTP client for decoder plugins. One requests.Session per process
+# keeps keep-alive connections pooled per host, so repeated snapshots from
+# the same camera or NVR reuse TCP/TLS connections. Also provides default
+# timeouts, retries with exponential backoff on connection errors and
+# 429/5xx, and a cap on concurrent requests per host (batch captures run
+# several fetches at once).
+#
+#   from app.utils import http_client
+#   frame = http_client.fetch_image(url)
+#   data = http_client.get(url, params=...).json()
+
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+
+USER_AGENT = "Feedalor-Capture/1.0"
+
+# Google Maps web services used by the api_route and api_iss decoders. The
+# benchmarks point this at a local stand-in (see benchmarks/README.md).
+GOOGLE_MAPS_API_BASE = os.getenv("GOOGLE_MAPS_API_BASE", "https://maps.googleapis.com/maps/api")
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+_host_slots = {}
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session():
+    """This process's pooled session (rebuilt after a fork, as sockets can't be shared)."""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _build_session()
+            _session_pid = os.getpid()
+            _host_slots.clear()
+        return _session
+
+
+@contextmanager
+def host_slot(url):
+    """Hold one of the HTTP_MAX_PER_HOST request slots for `url`'s host."""
+    host = urlsplit(url).netloc
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+    with slot:
+        yield
+
+
+def get(url, timeout=None, **kwargs):
+    """GET through the shared session; raises for HTTP errors after retries."""
+    session = get_session()
+    with host_slot(url):
+        resp = session.get(url, timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), **kwargs)
+    resp.raise_for_status()
+    return resp
+
+
+def fetch_bytes(url, timeout=None, **kwargs):
+    return get(url, timeout=timeout, **kwargs).content
+
+
+def decode_image(data):
+    """Decode encoded image bytes to a BGR frame without copying the buffer first."""
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Image decoding failed")
+    return frame
+
+
+def fetch_image(url, timeout=None, **kwargs):
+    return decode_image(fetch_bytes(url, timeout=timeout, **kwargs))
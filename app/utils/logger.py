@@ -4,7 +4,7 @@ import os
 import logging
 from logging.handlers import RotatingFileHandler
 
-LOG_FILE_PATH = "/app/db/app.log"  # Keep logs in the volume
+LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", "/app/db/app.log")  # Keep logs in the volume
 MAX_LOG_SIZE_MB = int(os.getenv("MAX_LOG_SIZE_MB", "10"))
 MAX_LOG_SIZE_BYTES = MAX_LOG_SIZE_MB * 1024 * 1024
 
@@ -0,0 +1,140 @@
+# app/utils/metrics.py
+#
+# Capture and dispatcher metrics shared by every process through Redis.
+# Each metric is one Redis hash (feedalor:metrics:<name>) whose fields are
+# the Prometheus label set, so any worker can add to it and the web process
+# renders the totals at /api/metrics. Recording never raises: a Redis
+# outage costs samples, not captures.
+
+import os
+import time
+from contextlib import contextmanager
+from app.utils.redis_conn import get_redis_connection
+from app.utils.logger import log_warning
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PREFIX = "feedalor:metrics"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name -> (type, help). Stage histograms are labelled by decoder only;
+# per-feed series are counters, which keeps the number of series small.
+METRICS = {
+    "feedalor_capture_stage_seconds": (
+        "histogram", "Time spent in each capture stage (decode, crop, change, dedup, encode, write, renditions, commit)"),
+    "feedalor_capture_queue_wait_seconds": ("histogram", "Time from enqueue to the capture job starting"),
+    "feedalor_capture_job_seconds": ("histogram", "Wall time of capture jobs"),
+    "feedalor_captures_total": ("counter", "Capture attempts by feed and result (stored, unchanged, failed, timeout)"),
+    "feedalor_dispatcher_tick_seconds": ("histogram", "Time the dispatcher spends per wake-up"),
+    "feedalor_dispatched_total": ("counter", "Feeds handed to the capture queue"),
+    "feedalor_dispatcher_in_flight": ("gauge", "Feeds holding a capture lease"),
+}
+
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = get_redis_connection()
+    return _redis
+
+
+def _key(name):
+    return f"{METRICS_PREFIX}:{name}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels):
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items()) if v is not None)
+
+
+@contextmanager
+def timed(timings, stage):
+    """Add the time spent in the block to timings[stage] (seconds)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def record(observations=(), counters=(), gauges=()):
+    """
+    Write samples in one round-trip. Each item is (name, labels, value):
+    observations go into histograms, counters are incremented and gauges set.
+    """
+    if not METRICS_ENABLED:
+        return
+    try:
+        pipe = _get_redis().pipeline(transaction=False)
+        for name, labels, value in observations:
+            key, label_str = _key(name), _labels(labels)
+            # Buckets are stored non-cumulative and summed when rendering.
+            le = next((str(b) for b in DURATION_BUCKETS if value <= b), "+Inf")
+            pipe.hincrby(key, f"{label_str}|{le}", 1)
+            pipe.hincrbyfloat(key, f"{label_str}|sum", value)
+            pipe.hincrby(key, f"{label_str}|count", 1)
+        for name, labels, value in counters:
+            pipe.hincrbyfloat(_key(name), _labels(labels), value)
+        for name, labels, value in gauges:
+            pipe.hset(_key(name), _labels(labels), value)
+        pipe.execute()
+    except Exception as e:
+        log_warning(f"[METRICS] Failed to record metrics: {e}")
+
+
+def forget_feed(feed_uuid):
+    """Drop the per-feed series of a deleted feed."""
+    marker = f'feed="{_escape(feed_uuid)}"'
+    try:
+        r = _get_redis()
+        for name in METRICS:
+            fields = [f for f in r.hkeys(_key(name)) if marker in f.decode()]
+            if fields:
+                r.hdel(_key(name), *fields)
+    except Exception as e:
+        log_warning(f"[METRICS] Failed to drop series for {feed_uuid}: {e}")
+
+
+def _series(name, label_str, extra=None):
+    parts = [p for p in (label_str, extra) if p]
+    return f"{name}{{{','.join(parts)}}}" if parts else name
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    r = _get_redis()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        data = {k.decode(): v.decode() for k, v in r.hgetall(_key(name)).items()}
+
+        if kind != "histogram":
+            for label_str in sorted(data):
+                lines.append(f"{_series(name, label_str)} {_number(data[label_str])}")
+            continue
+
+        by_labels = {}
+        for field, value in data.items():
+            label_str, _, part = field.rpartition("|")
+            by_labels.setdefault(label_str, {})[part] = value
+        for label_str in sorted(by_labels):
+            parts = by_labels[label_str]
+            cumulative = 0
+            for le in [str(b) for b in DURATION_BUCKETS] + ["+Inf"]:
+                cumulative += int(parts.get(le, 0))
+                le_label = f'le="{le}"'
+                lines.append(f"{_series(name + '_bucket', label_str, le_label)} {cumulative}")
+            lines.append(f"{_series(name + '_sum', label_str)} {_number(parts.get('sum', 0))}")
+            lines.append(f"{_series(name + '_count', label_str)} {_number(parts.get('count', 0))}")
+    return "\n".join(lines) + "\n"
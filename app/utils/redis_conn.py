@@ -0,0 +1,9 @@
+# app/utils/redis_conn.py
+import os
+from urllib.parse import urlparse
+from redis import Redis
+
+def get_redis_connection():
+    url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    parsed = urlparse(url)
+    return Redis(host=parsed.hostname, port=parsed.port)
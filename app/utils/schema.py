@@ -0,0 +1,62 @@
+# app/utils/schema.py
+#
+# db.create_all() only creates missing tables. When a model gains a column,
+# upgrade_schema() adds it to existing tables with ALTER TABLE so older
+# databases keep working without a migration tool. New columns must be
+# nullable or have a server default.
+#
+# entrypoint.sh runs this once before starting the worker, dispatcher and
+# Flask, so they don't race each other to apply the same DDL:
+#   PYTHONPATH=/app python3 -m app.utils.schema
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from app.utils.logger import log_info
+
+
+def _already_applied(error, message):
+    """True if `error` only says another process got there first."""
+    return message in str(getattr(error, "orig", error)).lower()
+
+
+def ensure_schema(db):
+    """Create missing tables and add missing columns. Safe to run from several processes."""
+    try:
+        db.create_all()
+    except OperationalError as e:
+        if not _already_applied(e, "already exists"):
+            raise
+        db.create_all()  # another process created some tables; finish the rest
+    upgrade_schema(db)
+
+
+def upgrade_schema(db):
+    with db.engine.begin() as conn:
+        # Inspect through the write connection, so the columns are read
+        # after any upgrade another process has committed.
+        inspector = inspect(conn)
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                try:
+                    conn.execute(text(ddl))
+                except OperationalError as e:
+                    if not _already_applied(e, "duplicate column name"):
+                        raise
+                    continue
+                log_info(f"[SCHEMA] Added column {table.name}.{column.name}")
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    create_app()  # create_app applies ensure_schema
+    print("Schema is up to date.")
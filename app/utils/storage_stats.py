@@ -0,0 +1,104 @@
+# app/utils/storage_stats.py
+#
+# Per-feed storage counters (feed_storage table). add_frame/remove_frames
+# adjust them incrementally, so /api/health reads O(feeds) rows instead of
+# walking static/. Files the capture overwrites in place (latest still,
+# renditions) are only re-measured by reconcile(), which the dispatcher
+# queues every STORAGE_RECONCILE_SECONDS.
+
+import os
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db, FeedStorage
+from app.utils.logger import log_info
+
+STORAGE_RECONCILE_SECONDS = int(os.getenv("STORAGE_RECONCILE_SECONDS", "3600"))
+
+
+def adjust(feed_uuid, files=0, size=0):
+    """Add `files` and `size` bytes (either may be negative) to a feed's counters. The caller commits."""
+    # One upsert, so two captures creating the same feed's row can't race.
+    stmt = sqlite_insert(FeedStorage).values(feed_uuid=feed_uuid, file_count=files, total_bytes=size)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FeedStorage.feed_uuid],
+        set_={"file_count": FeedStorage.file_count + stmt.excluded.file_count,
+              "total_bytes": FeedStorage.total_bytes + stmt.excluded.total_bytes},
+    )
+    db.session.execute(stmt)
+
+
+def drop(feed_uuid):
+    """Forget a feed's counters. The caller commits."""
+    FeedStorage.query.filter_by(feed_uuid=feed_uuid).delete(synchronize_session=False)
+
+
+def totals():
+    """Return (file_count, total_bytes, last reconcile time) across static/."""
+    count, size, reconciled_at = db.session.query(
+        func.coalesce(func.sum(FeedStorage.file_count), 0),
+        func.coalesce(func.sum(FeedStorage.total_bytes), 0),
+        func.min(FeedStorage.reconciled_at),
+    ).one()
+    return int(count), int(size), reconciled_at
+
+
+def per_feed():
+    """Return {feed_uuid: FeedStorage} for every measured feed directory, excluding STATIC_KEY."""
+    return {row.feed_uuid: row for row in FeedStorage.query.all() if row.feed_uuid != FeedStorage.STATIC_KEY}
+
+
+def _owner(rel_path):
+    """Feed uuid a static/ path belongs to, or STATIC_KEY."""
+    parts = rel_path.split(os.sep)
+    if parts[0] != "stills" or len(parts) < 2:
+        return FeedStorage.STATIC_KEY
+    candidate = parts[1] if len(parts) > 2 else parts[1].split(".")[0]
+    return candidate if candidate != "offline" else FeedStorage.STATIC_KEY
+
+
+def measure(static_path):
+    """Walk static/ and return {owner: [file_count, total_bytes]}."""
+    measured = {}
+    for root, dirs, files in os.walk(static_path):
+        for file in files:
+            full_path = os.path.join(root, file)
+            try:
+                size = os.stat(full_path).st_size
+            except FileNotFoundError:
+                continue
+            entry = measured.setdefault(_owner(os.path.relpath(full_path, static_path)), [0, 0])
+            entry[0] += 1
+            entry[1] += size
+    return measured
+
+
+def reconcile(static_path):
+    """
+    Replace every counter with a fresh measurement of `static_path`.
+    Adjustments made while the walk runs are overwritten; the next
+    reconcile picks them up. Returns the drift in bytes that was corrected.
+    """
+    measured = measure(static_path)
+    now = datetime.utcnow()
+    existing = {row.feed_uuid: row for row in FeedStorage.query.all()}
+
+    drift = 0
+    for owner, (count, size) in measured.items():
+        row = existing.pop(owner, None)
+        if row is None:
+            row = FeedStorage(feed_uuid=owner)
+            db.session.add(row)
+        else:
+            drift += abs((row.total_bytes or 0) - size)
+        row.file_count = count
+        row.total_bytes = size
+        row.reconciled_at = now
+
+    for row in existing.values():
+        drift += abs(row.total_bytes or 0)
+        db.session.delete(row)
+
+    db.session.commit()
+    log_info(f"[STORAGE] Reconciled {len(measured)} storage counters, corrected {drift} bytes of drift")
+    return drift
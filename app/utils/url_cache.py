@@ -0,0 +1,194 @@
+# app/utils/url_cache.py
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from app.utils.logger import log_info, log_warning
+from app.utils.redis_conn import get_redis_connection
+
+URL_CACHE_DIR = os.getenv("URL_CACHE_DIR", "/app/db/url_cache")
+REDIS_RETRY_SECONDS = 30  # how long to stay on the file cache after a Redis error
+
+_EXPIRE_PATH_RE = re.compile(r"/expire/(\d+)")
+
+
+def parse_expiry(resolved_url):
+    """
+    Return the unix expiry embedded in a signed media URL, or None.
+    googlevideo progressive URLs carry `?expire=<ts>`, HLS/DASH manifests
+    carry it as a path segment (`/expire/<ts>/`).
+    """
+    try:
+        parsed = urlparse(resolved_url)
+        values = parse_qs(parsed.query).get("expire")
+        if values:
+            return int(values[0])
+        match = _EXPIRE_PATH_RE.search(parsed.path)
+        if match:
+            return int(match.group(1))
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+class ResolvedUrlCache:
+    """
+    Cache of source URL -> resolved media URL shared by every worker.
+
+    Entries live in Redis when it is reachable and fall back to one JSON file
+    per entry under URL_CACHE_DIR. A Redis error switches to the files for
+    that call and the next REDIS_RETRY_SECONDS, then Redis is tried again.
+    An entry is valid until the expiry embedded in the resolved URL (minus
+    `safety_seconds`); once it is inside `refresh_margin` seconds of
+    expiring, the cached value is still served and a background thread
+    resolves a fresh one.
+    """
+
+    def __init__(self, namespace, resolver, default_ttl=1800, refresh_margin=900, safety_seconds=60):
+        self.namespace = namespace
+        self.resolver = resolver
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self.safety_seconds = safety_seconds
+        self._redis = None
+        self._redis_retry_at = 0.0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    # Public API
+
+    def get(self, url):
+        entry = self._load(url)
+        now = time.time()
+        if entry and entry["expires_at"] > now:
+            if entry["expires_at"] - now < self.refresh_margin:
+                self._refresh_async(url)
+            return entry["resolved"]
+        return self._resolve(url)
+
+    def invalidate(self, url):
+        key = self._key(url)
+        redis_conn = self._get_redis()
+        if redis_conn is not None:
+            try:
+                redis_conn.delete(key)
+            except Exception as e:
+                self._redis_failed(e)
+        try:
+            os.remove(self._file_path(key))
+        except FileNotFoundError:
+            pass
+
+    # Internals
+
+    def _resolve(self, url):
+        resolved = self.resolver(url)
+        expiry = parse_expiry(resolved)
+        now = time.time()
+        if expiry is None:
+            expires_at = now + self.default_ttl
+        else:
+            expires_at = expiry - self.safety_seconds
+        if expires_at > now:
+            self._store(url, {"resolved": resolved, "expires_at": expires_at})
+        log_info(f"[URL CACHE] Resolved {url} (valid {int(expires_at - now)}s)")
+        return resolved
+
+    def _refresh_async(self, url):
+        key = self._key(url)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        # Only one worker across the fleet refreshes a given entry.
+        redis_conn = self._get_redis()
+        if redis_conn is not None:
+            try:
+                if not redis_conn.set(f"{key}:refresh", 1, nx=True, ex=120):
+                    with self._lock:
+                        self._refreshing.discard(key)
+                    return
+            except Exception as e:
+                self._redis_failed(e)
+
+        def refresh():
+            try:
+                self._resolve(url)
+            except Exception as e:
+                log_warning(f"[URL CACHE] Background refresh failed for {url}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _key(self, url):
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        return f"feedalor:resolved:{self.namespace}:{digest}"
+
+    def _file_path(self, key):
+        return os.path.join(URL_CACHE_DIR, key.replace(":", "_") + ".json")
+
+    def _get_redis(self):
+        if self._redis is None and time.monotonic() >= self._redis_retry_at:
+            try:
+                conn = get_redis_connection()
+                conn.ping()
+                self._redis = conn
+            except Exception as e:
+                self._redis_failed(e)
+        return self._redis
+
+    def _redis_failed(self, error):
+        """Use the file cache until the retry time, then try Redis again."""
+        if self._redis is not None or self._redis_retry_at == 0.0:
+            log_warning(f"[URL CACHE] Redis unavailable, using file cache for {REDIS_RETRY_SECONDS}s: {error}")
+        self._redis = None
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _load(self, url):
+        key = self._key(url)
+        redis_conn = self._get_redis()
+        if redis_conn is not None:
+            try:
+                raw = redis_conn.get(key)
+                return json.loads(raw) if raw else None
+            except (ValueError, TypeError) as e:
+                log_warning(f"[URL CACHE] Failed to read cache entry for {url}: {e}")
+                return None
+            except Exception as e:
+                self._redis_failed(e)
+        try:
+            with open(self._file_path(key), "r") as f:
+                raw = f.read()
+            return json.loads(raw) if raw else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log_warning(f"[URL CACHE] Failed to read cache entry for {url}: {e}")
+            return None
+
+    def _store(self, url, entry):
+        key = self._key(url)
+        ttl = max(1, int(entry["expires_at"] - time.time()))
+        payload = json.dumps(entry)
+        redis_conn = self._get_redis()
+        if redis_conn is not None:
+            try:
+                redis_conn.set(key, payload, ex=ttl)
+                return
+            except Exception as e:
+                self._redis_failed(e)
+        try:
+            os.makedirs(URL_CACHE_DIR, exist_ok=True)
+            path = self._file_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            log_warning(f"[URL CACHE] Failed to store cache entry for {url}: {e}")
@@ -0,0 +1,62 @@
+# app/utils/zip_stream.py
+#
+# Streams a ZIP archive as it is built. Entries are STORED (JPEGs don't
+# compress further) and written through an unseekable sink, so zipfile uses
+# data descriptors instead of seeking back, and each chunk is handed to the
+# response as soon as it is read. Memory use does not depend on archive size.
+
+import io
+import os
+import zipfile
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only buffer that zipfile writes into and the generator drains."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, chunk_size=ZIP_CHUNK_SIZE):
+    """
+    Yield the bytes of a ZIP archive of `entries`, an iterable of
+    (arcname, path, modified datetime). Files that disappear before they
+    are read (e.g. pruned mid-download) are skipped.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for arcname, path, modified in entries:
+            try:
+                src = open(path, "rb")
+            except FileNotFoundError:
+                continue
+
+            with src:
+                info = zipfile.ZipInfo(arcname, date_time=modified.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                size = os.fstat(src.fileno()).st_size
+                with zf.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dest:
+                    while True:
+                        chunk = src.read(chunk_size)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        yield sink.drain()
+            yield sink.drain()
+
+    # Central directory, written on close.
+    yield sink.drain()
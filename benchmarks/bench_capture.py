@@ -0,0 +1,136 @@
+# benchmarks/bench_capture.py
+#
+# Runs capture_frame against the stand-in sources, one decoder at a time,
+# and reports throughput and per-stage latency from the capture_runs rows
+# the captures record. Import only after benchmarks.run has set up the
+# environment (database, log file, stand-in URLs).
+
+import os
+import shutil
+import time
+from uuid import uuid4
+from app.models import db, ExternalFeed, CaptureRun
+from app.tasks.capture import capture_frame, get_app
+from app.utils import frame_index, capture_runs
+
+# decoder -> source URL given the stand-in base URL
+DECODER_SOURCES = {
+    "single_frame": lambda base: f"{base}/frame.jpg",
+    "basic": lambda base: f"{base}/stream.mjpg",
+    "api_route": lambda base: "ROUTE:SW1A 1AA->EC1A 1BB",
+    "api_iss": lambda base: "ISS:zoom=3",
+    "webpage_snapshot_basic": lambda base: f"{base}/page.html",
+}
+
+STAGE_COLUMNS = ["queue_wait_ms", "decode_ms", "encode_ms", "write_ms", "total_ms"]
+
+
+def _add_feed(decoder_name, url, history_length):
+    feed = ExternalFeed(
+        uuid=f"bench-{decoder_name}-{uuid4().hex[:8]}",
+        title=f"Benchmark {decoder_name}",
+        url=url,
+        decoder_name=decoder_name,
+        seconds_per_capture=60,
+        history_length=history_length,
+        dispatch_mode="disabled",  # the dispatcher, if running, leaves these alone
+    )
+    db.session.add(feed)
+    return feed.uuid
+
+
+def _remove_feeds(feed_uuids):
+    stills = frame_index.stills_root()
+    for feed_uuid in feed_uuids:
+        shutil.rmtree(os.path.join(stills, feed_uuid), ignore_errors=True)
+        try:
+            os.remove(os.path.join(stills, f"{feed_uuid}.jpg"))
+        except OSError:
+            pass
+        frame_index.remove_feed(feed_uuid)
+        capture_runs.remove_feed(feed_uuid)
+        ExternalFeed.query.filter_by(uuid=feed_uuid).delete()
+    db.session.commit()
+
+
+def _stage_summary(runs):
+    summary = {}
+    for col in STAGE_COLUMNS:
+        values = sorted(getattr(r, col) for r in runs if getattr(r, col) is not None)
+        summary[col] = {
+            "p50": capture_runs.percentile(values, 50),
+            "p95": capture_runs.percentile(values, 95),
+            "p99": capture_runs.percentile(values, 99),
+            "mean": round(sum(values) / len(values), 2) if values else None,
+        }
+    return summary
+
+
+def bench_decoder(decoder_name, url, feeds=5, rounds=3):
+    """
+    Capture `feeds` feeds of one decoder `rounds` times, serially, after one
+    untimed warm-up capture.
+    """
+    warmup = _add_feed(decoder_name, url, 1)
+    feed_uuids = [_add_feed(decoder_name, url, rounds + 1) for _ in range(feeds)]
+    db.session.commit()
+
+    try:
+        capture_frame(warmup)
+
+        busy = 0.0
+        for _ in range(rounds):
+            for feed_uuid in feed_uuids:
+                started = time.perf_counter()
+                capture_frame(feed_uuid)
+                busy += time.perf_counter() - started
+
+        db.session.expire_all()
+        runs = CaptureRun.query.filter(CaptureRun.feed_uuid.in_(feed_uuids)).all()
+        errors = sorted({r.error for r in runs if r.error})
+        captures = len(runs)
+        stored = sum(1 for r in runs if r.result == "stored")
+        return {
+            "url": url,
+            "captures": captures,
+            "stored": stored,
+            "failures": sum(1 for r in runs if r.result in capture_runs.FAILED_RESULTS),
+            "frames_per_sec": round(captures / busy, 2) if busy else None,
+            "busy_seconds": round(busy, 3),
+            "mean_bytes": int(sum(r.bytes or 0 for r in runs) / stored) if stored else None,
+            "stages_ms": _stage_summary(runs),
+            "errors": errors[:5],
+        }
+    finally:
+        _remove_feeds([warmup] + feed_uuids)
+
+
+def _redirect_plugin_caches(workdir):
+    """Keep api_route's map cache and API tally out of the source tree."""
+    from app.plugins.registry import get_decoder_by_name
+
+    route = get_decoder_by_name("api_route")
+    if route is not None:
+        route.CACHE_DIR = os.path.join(workdir, "api_route", "map_cache")
+        route.TALLY_FILE = os.path.join(workdir, "api_route", "api_tally.txt")
+
+
+def run(base_url, workdir, decoders=None, feeds=5, rounds=3):
+    """Benchmark each decoder; a decoder that can't be loaded is reported, not fatal."""
+    from app.plugins.registry import get_decoder_by_name
+
+    results = {}
+    with get_app().app_context():
+        _redirect_plugin_caches(workdir)
+        for decoder_name in decoders or DECODER_SOURCES:
+            if get_decoder_by_name(decoder_name) is None:
+                results[decoder_name] = {"skipped": "decoder not registered"}
+                continue
+            url = DECODER_SOURCES[decoder_name](base_url)
+            print(f"[bench] capture_frame with {decoder_name} ({feeds} feeds x {rounds} rounds)")
+            try:
+                results[decoder_name] = bench_decoder(decoder_name, url, feeds, rounds)
+            except Exception as e:
+                db.session.rollback()
+                results[decoder_name] = {"skipped": f"{type(e).__name__}: {e}"}
+    return results
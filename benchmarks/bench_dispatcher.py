@@ -0,0 +1,96 @@
+# benchmarks/bench_dispatcher.py
+#
+# Cost of the dispatcher's scheduling work at different feed counts. The
+# DispatchSchedule is driven on a simulated clock with synthetic feeds, so
+# no database, Redis or RQ is involved: each tick pops the due feeds and
+# applies their "captured" events the way dispatcher_loop does.
+
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.tasks.dispatcher import DispatchSchedule, capture_jobs
+from app.utils.capture_runs import percentile
+
+INTERVALS = [10, 15, 30, 60, 120, 300, 900]
+HOSTS = 200
+
+
+def synthetic_feeds(count, now, seed=0):
+    """Feeds with a mix of intervals and hosts, mostly interval mode, some adaptive and scheduled."""
+    rng = random.Random(seed)
+    feeds = []
+    for i in range(count):
+        interval = rng.choice(INTERVALS)
+        mode = rng.choices(["interval", "adaptive", "schedule"], weights=[85, 10, 5])[0]
+        feeds.append(SimpleNamespace(
+            uuid=f"bench-{i:06d}",
+            decoder_name=rng.choice(["single_frame", "basic"]),
+            url=f"http://cam{i % HOSTS}.bench.invalid/frame.jpg",
+            dispatch_mode=mode,
+            seconds_per_capture=interval,
+            capture_at_times=[f"{h:02d}:{m:02d}:00" for h in range(24) for m in (0, 30)] if mode == "schedule" else None,
+            last_capture_at=now - timedelta(seconds=rng.uniform(0, interval)),
+            last_failed_at=None,
+            failure_count=0,
+            adaptive_seconds=None,
+            adaptive_min_seconds=None,
+            adaptive_max_seconds=None,
+            is_capturing=False,
+            capture_lease_until=None,
+        ))
+    return feeds
+
+
+def bench_schedule(count, simulated_seconds=300, seed=0):
+    """
+    Load `count` feeds, then run one tick per simulated second. Captures
+    complete instantly, so every dispatched feed is rescheduled in the
+    same tick, which is the dispatcher's busiest case.
+    """
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    feeds = synthetic_feeds(count, now, seed)
+    by_uuid = {f.uuid: f for f in feeds}
+    schedule = DispatchSchedule()
+
+    started = time.perf_counter()
+    schedule.load(feeds, now)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    tick_ms = []
+    dispatched = 0
+    for _ in range(simulated_seconds):
+        now += timedelta(seconds=1)
+        started = time.perf_counter()
+        due = schedule.pop_due(now)
+        capture_jobs(due)
+        for sched in due:
+            feed = by_uuid[sched.uuid]
+            feed.last_capture_at = now
+            schedule.update(feed, now)
+        tick_ms.append((time.perf_counter() - started) * 1000)
+        dispatched += len(due)
+
+    tick_ms.sort()
+    return {
+        "feeds": count,
+        "load_ms": round(load_ms, 3),
+        "ticks": len(tick_ms),
+        "dispatched": dispatched,
+        "tick_ms": {
+            "p50": round(percentile(tick_ms, 50), 4),
+            "p95": round(percentile(tick_ms, 95), 4),
+            "p99": round(percentile(tick_ms, 99), 4),
+            "max": round(tick_ms[-1], 4),
+            "mean": round(sum(tick_ms) / len(tick_ms), 4),
+        },
+        "per_dispatch_us": round(sum(tick_ms) * 1000 / dispatched, 2) if dispatched else None,
+    }
+
+
+def run(sizes=(10, 1000, 10000), simulated_seconds=300):
+    results = {}
+    for count in sizes:
+        print(f"[bench] dispatcher schedule with {count} feeds")
+        results[str(count)] = bench_schedule(count, simulated_seconds)
+    return results
@@ -0,0 +1,61 @@
+# benchmarks/compare.py
+#
+#   python -m benchmarks.compare OLD.json NEW.json [--threshold 10]
+#
+# Prints every numeric result that appears in both files with its change,
+# flagging changes larger than the threshold (percent). Lower is better for
+# everything except throughput and counts of work done (frames_per_sec,
+# dispatched, rps, ...).
+
+import argparse
+import json
+
+HIGHER_IS_BETTER = ("frames_per_sec", "dispatched", "stored", "captures", "rps", "requests")
+
+
+def flatten(data, prefix=""):
+    items = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if prefix == "" and key == "meta":
+                continue
+            items.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        items[prefix[:-1]] = data
+    return items
+
+
+def compare(old, new, threshold=10.0):
+    old_items, new_items = flatten(old), flatten(new)
+    rows = []
+    for key in sorted(old_items.keys() & new_items.keys()):
+        before, after = old_items[key], new_items[key]
+        change = (after - before) / before * 100 if before else None
+        flag = ""
+        if change is not None and abs(change) >= threshold:
+            better = (change > 0) == key.rsplit(".", 1)[-1].startswith(HIGHER_IS_BETTER)
+            flag = "better" if better else "WORSE"
+        rows.append((key, before, after, change, flag))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"old: {old.get('meta', {}).get('git_revision')}  new: {new.get('meta', {}).get('git_revision')}")
+    for key, before, after, change, flag in compare(old, new, args.threshold):
+        pct = f"{change:+.1f}%" if change is not None else "n/a"
+        print(f"{key:60} {before:>12.4g} {after:>12.4g} {pct:>9} {flag}")
+
+
+if __name__ == "__main__":
+    main()
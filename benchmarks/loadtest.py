@@ -0,0 +1,345 @@
+# benchmarks/loadtest.py
+#
+# Load test for the read side: simulated dashboards polling the API and
+# grid views of a running server.
+#
+#   python -m benchmarks.loadtest seed --feeds 2000 --frames 10     # fixture feeds + stills
+#   python -m benchmarks.loadtest run --base-url http://localhost:5001 --dashboards 10,50,200
+#   python -m benchmarks.loadtest clean
+#
+# `seed` and `clean` work on the app's own database and static/ directory,
+# so run them where the server runs (same DATABASE_URL). `run` only needs
+# HTTP access to the server.
+
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PREFIX = "load-"
+TEMPLATE_NAME = ".loadtest-template"
+
+
+# --- Fixture -------------------------------------------------------------
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            dst.write(src.read())
+
+
+def _write_templates(stills_dir, width, height):
+    """One full frame and its renditions; every fixture still is a hardlink to these."""
+    import cv2
+    import numpy as np
+    from benchmarks.standins import make_frames
+    from app.tasks.capture import RENDITIONS
+
+    os.makedirs(stills_dir, exist_ok=True)
+    full = make_frames(width, height, count=1)[0]
+    paths = {"full": os.path.join(stills_dir, f"{TEMPLATE_NAME}.jpg")}
+    with open(paths["full"], "wb") as f:
+        f.write(full)
+
+    frame = cv2.imdecode(np.frombuffer(full, dtype=np.uint8), cv2.IMREAD_COLOR)
+    for name, (max_w, max_h) in RENDITIONS:
+        scale = min(max_w / width, max_h / height, 1.0)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        ok, buf = cv2.imencode(".jpg", cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+        paths[name] = os.path.join(stills_dir, f"{TEMPLATE_NAME}.{name}.jpg")
+        with open(paths[name], "wb") as f:
+            f.write(buf.tobytes())
+    return paths
+
+
+def seed(feeds, frames, width=1280, height=720, batch=200):
+    """
+    Add `feeds` disabled feeds (uuid prefix "load-"), each with `frames`
+    history stills, a latest still and renditions. Stills are hardlinks to
+    one template image, so a large fixture costs little disk.
+    """
+    from app.tasks.capture import get_app, RENDITIONS
+    from app.models import db, ExternalFeed
+    from app.utils import frame_index
+    from app.utils.feed_events import publish_feed_event
+
+    with get_app().app_context():
+        stills_dir = frame_index.stills_root()
+        templates = _write_templates(stills_dir, width, height)
+        size = os.path.getsize(templates["full"])
+        existing = ExternalFeed.query.filter(ExternalFeed.uuid.like(f"{FIXTURE_PREFIX}%")).count()
+        now = datetime.utcnow().replace(microsecond=0)
+
+        for i in range(existing, existing + feeds):
+            feed_uuid = f"{FIXTURE_PREFIX}{i:06d}"
+            history_dir = os.path.join(stills_dir, feed_uuid)
+            os.makedirs(history_dir, exist_ok=True)
+            db.session.add(ExternalFeed(
+                uuid=feed_uuid, title=f"Load test {i:06d}", url="http://load.invalid/frame.jpg",
+                decoder_name="single_frame", seconds_per_capture=60, history_length=frames,
+                dispatch_mode="disabled", last_capture_at=now,
+            ))
+            for n in range(frames):
+                captured_at = now - timedelta(minutes=n)
+                filename = f"{feed_uuid}_{captured_at.strftime(frame_index.FILENAME_TIME_FORMAT)}.jpg"
+                _link_or_copy(templates["full"], os.path.join(history_dir, filename))
+                frame_index.add_frame(feed_uuid, filename, captured_at, size)
+            _link_or_copy(templates["full"], os.path.join(stills_dir, f"{feed_uuid}.jpg"))
+            for name, _ in RENDITIONS:
+                _link_or_copy(templates[name], os.path.join(history_dir, f"{feed_uuid}.{name}.jpg"))
+            if (i + 1) % batch == 0:
+                db.session.commit()
+        db.session.commit()
+        publish_feed_event("reload")
+        print(f"[loadtest] Seeded {feeds} feeds with {frames} frames each ({existing + feeds} fixture feeds total)")
+
+
+def clean():
+    """Remove every fixture feed, its stills and index rows."""
+    import shutil
+    from app.tasks.capture import get_app
+    from app.models import db, ExternalFeed
+    from app.utils import frame_index
+    from app.utils.feed_events import publish_feed_event
+
+    with get_app().app_context():
+        stills_dir = frame_index.stills_root()
+        feeds = ExternalFeed.query.filter(ExternalFeed.uuid.like(f"{FIXTURE_PREFIX}%")).all()
+        for feed in feeds:
+            shutil.rmtree(os.path.join(stills_dir, feed.uuid), ignore_errors=True)
+            try:
+                os.remove(os.path.join(stills_dir, f"{feed.uuid}.jpg"))
+            except OSError:
+                pass
+            frame_index.remove_feed(feed.uuid)
+            db.session.delete(feed)
+        db.session.commit()
+        for name in os.listdir(stills_dir):
+            if name.startswith(TEMPLATE_NAME):
+                os.remove(os.path.join(stills_dir, name))
+        publish_feed_event("reload")
+        print(f"[loadtest] Removed {len(feeds)} fixture feeds")
+
+
+# --- Load generator ------------------------------------------------------
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list, or None if it is empty."""
+    if not values:
+        return None
+    rank = math.ceil(pct / 100 * len(values)) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+class Stats:
+    """Latencies and status codes per endpoint, shared by all dashboards."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency_ms = {}
+        self.statuses = {}
+        self.bytes = Counter()
+
+    def add(self, endpoint, status, latency_ms, size):
+        with self._lock:
+            self.latency_ms.setdefault(endpoint, []).append(latency_ms)
+            self.statuses.setdefault(endpoint, Counter())[str(status)] += 1
+            self.bytes[endpoint] += size
+
+    def summary(self, elapsed):
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self.latency_ms.items()):
+            values = sorted(values)
+            statuses = self.statuses[endpoint]
+            errors = sum(n for status, n in statuses.items() if not status.startswith(("2", "3")))
+            total += len(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "rps": round(len(values) / elapsed, 2),
+                "errors": errors,
+                "statuses": dict(statuses),
+                "bytes": self.bytes[endpoint],
+                "latency_ms": {
+                    "p50": round(percentile(values, 50), 2),
+                    "p95": round(percentile(values, 95), 2),
+                    "p99": round(percentile(values, 99), 2),
+                    "max": round(values[-1], 2),
+                },
+            }
+        return {"requests": total, "rps": round(total / elapsed, 2), "endpoints": endpoints}
+
+
+class Dashboard(threading.Thread):
+    """
+    One simulated viewer. Every `interval` seconds it reloads the feed list
+    and the thumbnails of its page of feeds, sometimes opens a history
+    frame, and every few cycles loads the grid pages. With `revalidate` it
+    sends If-None-Match like a browser cache would.
+    """
+
+    def __init__(self, index, args, stats, stop):
+        super().__init__(name=f"dashboard-{index}", daemon=True)
+        self.args = args
+        self.stats = stats
+        self.stop = stop
+        self.rng = random.Random(index)
+        self.session = requests.Session()
+        self.etags = {}
+        self.feeds = []
+        self.offset = index * args.page_size
+
+    def get(self, endpoint, path):
+        url = f"{self.args.base_url}{path}"
+        headers = {}
+        if self.args.revalidate and url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        started = time.perf_counter()
+        try:
+            resp = self.session.get(url, headers=headers, timeout=self.args.timeout)
+            body = resp.content
+            status = resp.status_code
+            if resp.headers.get("ETag"):
+                self.etags[url] = resp.headers["ETag"]
+        except requests.RequestException:
+            resp, body, status = None, b"", "error"
+        self.stats.add(endpoint, status, (time.perf_counter() - started) * 1000, len(body))
+        return resp
+
+    def cycle(self, n):
+        resp = self.get("feeds_list", "/api/feeds")
+        if resp is not None and resp.status_code == 200:
+            try:
+                self.feeds = [f["uuid"] for f in resp.json()]
+            except ValueError:
+                self.feeds = []
+        feeds = self.feeds  # kept as-is on 304 or errors
+        if self.args.prefix:
+            feeds = [u for u in feeds if u.startswith(self.args.prefix)]
+        if not feeds:
+            return
+
+        start = self.offset % len(feeds)
+        page = (feeds[start:] + feeds[:start])[:self.args.page_size]
+        for feed_uuid in page:
+            if self.stop.is_set():
+                return
+            self.get("frame_thumb", f"/api/feeds/{feed_uuid}/frames/0?size=thumb")
+            if self.rng.random() < self.args.history_ratio:
+                index = self.rng.randrange(self.args.history_frames)
+                self.get("frame_history", f"/api/feeds/{feed_uuid}/frames/{index}")
+
+        if n % self.args.grid_every == 0:
+            self.get("standard_grid", "/standard_grid")
+            self.get("custom_grid", f"/custom_grid?feeds={','.join(page)}")
+
+    def run(self):
+        # Stagger start-up so dashboards don't all poll in the same instant.
+        if self.stop.wait(self.rng.uniform(0, self.args.interval)):
+            return
+        n = 0
+        while not self.stop.is_set():
+            started = time.monotonic()
+            self.cycle(n)
+            n += 1
+            wait = self.args.interval * self.rng.uniform(0.9, 1.1) - (time.monotonic() - started)
+            if wait > 0 and self.stop.wait(wait):
+                return
+
+
+def run_level(args, dashboards):
+    stats = Stats()
+    stop = threading.Event()
+    threads = [Dashboard(i, args, stats, stop) for i in range(dashboards)]
+    print(f"[loadtest] {dashboards} dashboards for {args.duration}s against {args.base_url}")
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(args.timeout + 1)
+    return stats.summary(time.monotonic() - started)
+
+
+def run(args):
+    results = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "args": vars(args),
+        },
+        "levels": {},
+    }
+    for dashboards in args.dashboards:
+        level = run_level(args, dashboards)
+        results["levels"][str(dashboards)] = level
+        print(f"[loadtest]   {level['requests']} requests, {level['rps']} req/s")
+        for endpoint, s in level["endpoints"].items():
+            lat = s["latency_ms"]
+            print(f"[loadtest]   {endpoint:14} {s['rps']:>8} req/s  p50 {lat['p50']:>8} ms  "
+                  f"p95 {lat['p95']:>8} ms  p99 {lat['p99']:>8} ms  errors {s['errors']}")
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"loadtest-{datetime.utcnow():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"[loadtest] Results written to {output}")
+    return results
+
+
+def _ints(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feedalor read-side load test")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_seed = sub.add_parser("seed", help="add fixture feeds and stills to the local database")
+    p_seed.add_argument("--feeds", type=int, default=2000)
+    p_seed.add_argument("--frames", type=int, default=10, help="history stills per feed")
+    p_seed.add_argument("--width", type=int, default=1280)
+    p_seed.add_argument("--height", type=int, default=720)
+
+    sub.add_parser("clean", help="remove the fixture feeds and stills")
+
+    p_run = sub.add_parser("run", help="poll a running server with simulated dashboards")
+    p_run.add_argument("--base-url", default="http://localhost:5001")
+    p_run.add_argument("--dashboards", type=_ints, default=[10],
+                       help="comma-separated dashboard counts; each is run in turn")
+    p_run.add_argument("--duration", type=float, default=60, help="seconds per dashboard count")
+    p_run.add_argument("--interval", type=float, default=5, help="seconds between a dashboard's polls")
+    p_run.add_argument("--page-size", type=int, default=24, help="thumbnails per dashboard page")
+    p_run.add_argument("--history-ratio", type=float, default=0.1,
+                       help="chance per thumbnail of also opening a history frame")
+    p_run.add_argument("--history-frames", type=int, default=10, help="history depth to pick frames from")
+    p_run.add_argument("--grid-every", type=int, default=5, help="load the grid pages every N polls")
+    p_run.add_argument("--prefix", default=None, help="only poll feeds whose uuid starts with this (e.g. load-)")
+    p_run.add_argument("--no-revalidate", dest="revalidate", action="store_false",
+                       help="don't send If-None-Match")
+    p_run.add_argument("--timeout", type=float, default=30)
+    p_run.add_argument("--output", help="result file (default: benchmarks/results/loadtest-<time>.json)")
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        seed(args.feeds, args.frames, args.width, args.height)
+    elif args.command == "clean":
+        clean()
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/run.py
+#
+#   python -m benchmarks.run [--decoders single_frame,basic] [--sizes 10,1000,10000]
+#
+# Starts the stand-in sources, points the app at a throwaway database and
+# log file, runs the capture and dispatcher benchmarks and writes one JSON
+# result file. Compare two result files with benchmarks/compare.py.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def configure_environment(workdir, base_url):
+    """
+    Must run before anything under app/ is imported: config, logger and the
+    decoders read these at import time.
+    """
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["LOG_FILE_PATH"] = os.path.join(workdir, "bench.log")
+    os.environ["GOOGLE_MAPS_API_BASE"] = f"{base_url}/maps/api"
+    os.environ["ISS_POSITION_URL"] = f"{base_url}/iss-now.json"
+    os.environ.setdefault("GOOGLE_MAPS_API_KEY", "benchmark")
+    os.environ.setdefault("METRICS_ENABLED", "false")   # keep Redis round-trips out of the timings
+    os.environ.setdefault("HTTP_RETRIES", "0")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _csv(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feedalor capture pipeline benchmarks")
+    parser.add_argument("--decoders", type=_csv, default=None,
+                        help="comma-separated decoders to benchmark (default: all with a stand-in)")
+    parser.add_argument("--feeds", type=int, default=5, help="feeds per decoder")
+    parser.add_argument("--rounds", type=int, default=3, help="captures per feed")
+    parser.add_argument("--width", type=int, default=1280, help="stand-in frame width")
+    parser.add_argument("--height", type=int, default=720, help="stand-in frame height")
+    parser.add_argument("--sizes", type=lambda v: [int(n) for n in _csv(v)], default=[10, 1000, 10000],
+                        help="feed counts for the dispatcher benchmark")
+    parser.add_argument("--ticks", type=int, default=300, help="simulated dispatcher seconds per size")
+    parser.add_argument("--skip-capture", action="store_true")
+    parser.add_argument("--skip-dispatcher", action="store_true")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<time>-<rev>.json)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    from benchmarks.standins import StandInServer
+
+    workdir = tempfile.mkdtemp(prefix="feedalor-bench-")
+    server = StandInServer(args.width, args.height).start()
+    configure_environment(workdir, server.base_url)
+
+    revision = git_revision()
+    results = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+    }
+
+    try:
+        if not args.skip_capture:
+            from benchmarks import bench_capture
+            results["capture"] = bench_capture.run(server.base_url, workdir, args.decoders,
+                                                   args.feeds, args.rounds)
+        if not args.skip_dispatcher:
+            from benchmarks import bench_dispatcher
+            results["dispatcher"] = bench_dispatcher.run(args.sizes, args.ticks)
+    finally:
+        server.stop()
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"{datetime.utcnow():%Y%m%d_%H%M%S}-{revision or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"[bench] Results written to {output} (scratch files in {workdir})")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# benchmarks/standins.py
+#
+# Local stand-ins for the sources the decoders talk to, so benchmarks run
+# offline and see the same input every time. One threaded HTTP server
+# serves all of them:
+#
+#   /frame.jpg                  single JPEG (single_frame)
+#   /stream.mjpg                multipart MJPEG stream (basic)
+#   /maps/api/directions/json   Google Directions response (api_route)
+#   /maps/api/staticmap         Google Static Maps PNG (api_route, api_iss)
+#   /iss-now.json               Open Notify ISS position (api_iss)
+#   /page.html                  static HTML page (webpage_snapshot_basic)
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+import polyline
+
+FRAME_VARIANTS = 8
+MJPEG_BOUNDARY = "benchframe"
+MJPEG_FPS = 25
+
+ROUTE_POINTS = [(51.5014, -0.1419), (51.5079, -0.1281), (51.5155, -0.0922), (51.5200, -0.0977)]
+
+PAGE_HTML = """<!DOCTYPE html>
+<html><head><title>Benchmark page</title>
+<style>body{font-family:sans-serif;margin:0;background:#f4faff}
+.tile{display:inline-block;width:180px;height:120px;margin:8px;background:#2a4f7a;color:#fff}</style>
+</head><body><h1>Feedalor benchmark page</h1>
+%s
+</body></html>""" % "\n".join(f'<div class="tile">Tile {i}</div>' for i in range(40))
+
+
+def make_frames(width, height, count=FRAME_VARIANTS, seed=0):
+    """
+    JPEG-encoded test frames: a gradient with noise and a frame number, so
+    consecutive frames differ the way camera frames do.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.dstack([np.broadcast_to(x, (height, width)),
+                      np.broadcast_to(y, (height, width)),
+                      np.full((height, width), 128, np.float32)])
+    frames = []
+    for i in range(count):
+        noise = rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+        img = np.clip(base + noise, 0, 255).astype(np.uint8)
+        cv2.putText(img, f"frame {i}", (20, height // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    max(1.0, width / 400), (255, 255, 255), 3)
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        frames.append(buf.tobytes())
+    return frames
+
+
+def make_png(width, height):
+    img = np.full((height, width, 3), (230, 226, 214), np.uint8)
+    for i in range(0, width, 64):
+        cv2.line(img, (i, 0), (i, height), (200, 200, 200), 1)
+    for j in range(0, height, 64):
+        cv2.line(img, (0, j), (width, j), (200, 200, 200), 1)
+    ok, buf = cv2.imencode(".png", img)
+    return buf.tobytes()
+
+
+class StandInServer:
+    """Serve the stand-in endpoints on 127.0.0.1 from a background thread."""
+
+    def __init__(self, width=1280, height=720, port=0):
+        self.frames = make_frames(width, height)
+        self.map_png = make_png(800, 600)
+        self._next_frame = itertools.count()
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def frame(self):
+        return self.frames[next(self._next_frame) % len(self.frames)]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-standins", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        standins = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                standins.requests += 1
+                path = self.path.split("?", 1)[0]
+                if path == "/frame.jpg":
+                    self._send(standins.frame(), "image/jpeg")
+                elif path == "/stream.mjpg":
+                    self._stream()
+                elif path == "/maps/api/directions/json":
+                    self._send(json.dumps(directions_response()).encode(), "application/json")
+                elif path == "/maps/api/staticmap":
+                    self._send(standins.map_png, "image/png")
+                elif path == "/iss-now.json":
+                    self._send(json.dumps(iss_response()).encode(), "application/json")
+                elif path == "/page.html":
+                    self._send(PAGE_HTML.encode(), "text/html; charset=utf-8")
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}")
+                self.end_headers()
+                try:
+                    while True:
+                        jpeg = standins.frame()
+                        self.wfile.write(f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                         f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                        time.sleep(1 / MJPEG_FPS)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+def directions_response():
+    return {
+        "status": "OK",
+        "routes": [{
+            "overview_polyline": {"points": polyline.encode(ROUTE_POINTS)},
+            "legs": [{
+                "duration": {"text": "14 mins", "value": 840},
+                "duration_in_traffic": {"text": "19 mins", "value": 1140},
+            }],
+        }],
+    }
+
+
+def iss_response():
+    t = time.time()
+    return {
+        "message": "success",
+        "timestamp": int(t),
+        "iss_position": {"latitude": f"{51.0 * np.sin(t / 900):.4f}", "longitude": f"{(t / 15) % 360 - 180:.4f}"},
+    }
@@ -4,5 +4,5 @@ import os
 class Config:
     DEBUG = True
     SECRET_KEY = os.getenv("SECRET_KEY", "dev")
-    SQLALCHEMY_DATABASE_URI = "sqlite:////app/db/externalfeeds.db"
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:////app/db/externalfeeds.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -18,9 +18,17 @@ if [ ! -f /app/db/externalfeeds.db ]; then
   PYTHONPATH=/app python3 app/utils/init_db.py
 fi
 
-# Launch RQ worker in background
+# Apply schema upgrades once, before the processes below start together
+echo "[+] Upgrading database schema..."
+PYTHONPATH=/app python3 -m app.utils.schema
+
+# Launch warm RQ worker in background (see docs/capture_worker.md)
 echo "[+] Launching RQ worker..."
-rq worker feed-tasks --url $REDIS_URL &
+PYTHONPATH=/app python3 -m app.tasks.worker &
+
+# Retention and storage reconcile get their own worker so they never delay captures
+echo "[+] Launching housekeeping worker..."
+PYTHONPATH=/app python3 -m app.tasks.worker housekeeping &
 
 # Launch Dispatcher in background
 echo "[+] Starting Dispatcher Loop..."
@@ -11,6 +11,7 @@ import FeedViewerModal from './components/FeedViewerModal';
 import EditFeedModal from './components/EditFeedModal';
 import SettingsModal from './components/SettingsModal';
 import MobileFeedViewer from './components/MobileFeedViewer';
+import { useFeedEvents } from './hooks/useFeedEvents';
 
 
 function App() {
@@ -32,25 +33,24 @@ function App() {
     fetchAll();
   }, []);
 
+  // New captures and feed edits are pushed over /api/events, so only the
+  // affected rows reload. The interval is a slow safety net.
+  useFeedEvents({
+    onCaptured: ({ uuid, ok, changed, captured_at }) => {
+      if (!ok || changed === false) return;
+      setFeeds(prev => prev.map(f => (f.uuid === uuid ? { ...f, last_capture_at: captured_at } : f)));
+    },
+    onFeedsChanged: () => fetchAll(),
+    onReconnect: () => fetchAll(),
+  });
+
   useEffect(() => {
     const fullInterval = setInterval(() => {
       fetchAll();
-    }, 30000);
-
-    const offlineInterval = setInterval(() => {
-      const now = Date.now();
-      document.querySelectorAll('img').forEach(img => {
-        if (img.src.includes('offline.jpg')) {
-          const originalSrc = img.dataset.originalSrc || img.src;
-          img.dataset.originalSrc = originalSrc;
-          img.src = originalSrc.split('?')[0] + `?refresh=${now}`;
-        }
-      });
-    }, 10000);
+    }, 300000);
 
     return () => {
       clearInterval(fullInterval);
-      clearInterval(offlineInterval);
     };
   }, []);
 
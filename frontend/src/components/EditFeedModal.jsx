@@ -14,6 +14,12 @@ function EditFeedModal({ feed, onClose, onSave }) {
   const [gpsLatitude, setGpsLatitude] = useState(feed.gps_latitude ?? '');
   const [gpsLongitude, setGpsLongitude] = useState(feed.gps_longitude ?? '');
   const [gpsImgDirection, setGpsImgDirection] = useState(feed.gps_img_direction ?? '');
+  const [dedupEnabled, setDedupEnabled] = useState(!!feed.dedup_enabled);
+  const [dedupTolerance, setDedupTolerance] = useState(feed.dedup_tolerance ?? 0);
+  const [changeThreshold, setChangeThreshold] = useState(feed.change_threshold ?? '');
+  const [keyframeMinutes, setKeyframeMinutes] = useState(feed.keyframe_minutes ?? '');
+  const [adaptiveMin, setAdaptiveMin] = useState(feed.adaptive_min_seconds ?? '');
+  const [adaptiveMax, setAdaptiveMax] = useState(feed.adaptive_max_seconds ?? '');
 
 
 const handleSave = () => {
@@ -76,7 +82,13 @@ const handleSave = () => {
     dispatch_mode: dispatchMode,
     gps_latitude: hasLat ? parseFloat(lat) : null,
     gps_longitude: hasLon ? parseFloat(lon) : null,
-    gps_img_direction: dir !== '' ? parseInt(dir) : null
+    gps_img_direction: dir !== '' ? parseInt(dir) : null,
+    dedup_enabled: dedupEnabled,
+    dedup_tolerance: dedupTolerance || 0,
+    change_threshold: changeThreshold !== '' ? parseFloat(changeThreshold) : null,
+    keyframe_minutes: keyframeMinutes !== '' ? parseInt(keyframeMinutes) : null,
+    adaptive_min_seconds: adaptiveMin !== '' ? parseInt(adaptiveMin) : null,
+    adaptive_max_seconds: adaptiveMax !== '' ? parseInt(adaptiveMax) : null
   })
     .then(() => {
       setSaving(false);
@@ -95,6 +107,7 @@ const handleSave = () => {
 
   const isSchedule = dispatchMode === 'schedule';
   const isDisabled = dispatchMode === 'disabled';
+  const isAdaptive = dispatchMode === 'adaptive';
 
   return (
     <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50">
@@ -120,6 +133,7 @@ const handleSave = () => {
           >
             <option value="interval">🕒 Interval</option>
             <option value="schedule">📅 Schedule</option>
+            <option value="adaptive">📈 Adaptive</option>
             <option value="disabled">🚫 Disabled</option>
           </select>
         </label>
@@ -137,6 +151,33 @@ const handleSave = () => {
           />
         </label>
 
+        {isAdaptive && (
+          <div className="grid grid-cols-2 gap-2 mb-2">
+            <label className="block">
+              Fastest (s):
+              <input
+                type="number"
+                min="1"
+                className="border p-2 w-full"
+                value={adaptiveMin}
+                onChange={(e) => setAdaptiveMin(e.target.value)}
+                placeholder="10"
+              />
+            </label>
+            <label className="block">
+              Slowest (s):
+              <input
+                type="number"
+                min="1"
+                className="border p-2 w-full"
+                value={adaptiveMax}
+                onChange={(e) => setAdaptiveMax(e.target.value)}
+                placeholder="3600"
+              />
+            </label>
+          </div>
+        )}
+
         <label className="block mb-4">
           History Length:
           <input
@@ -185,6 +226,55 @@ const handleSave = () => {
           />
         </label>
 
+        <label className="block mb-2">
+          <input
+            type="checkbox"
+            className="mr-2"
+            checked={dedupEnabled}
+            onChange={(e) => setDedupEnabled(e.target.checked)}
+          />
+          Store unchanged frames once (deduplicate)
+        </label>
+
+        <label className="block mb-4">
+          Dedup Tolerance (0 = identical only, up to 64):
+          <input
+            type="number"
+            min="0"
+            max="64"
+            className="border p-2 w-full"
+            value={dedupTolerance}
+            onChange={(e) => setDedupTolerance(parseInt(e.target.value))}
+            disabled={!dedupEnabled}
+          />
+        </label>
+
+        <label className="block mb-2">
+          Change Threshold (0–255, blank = store every frame):
+          <input
+            type="number"
+            min="0"
+            max="255"
+            step="0.5"
+            className="border p-2 w-full"
+            value={changeThreshold}
+            onChange={(e) => setChangeThreshold(e.target.value)}
+            placeholder="e.g. 4"
+          />
+        </label>
+
+        <label className="block mb-4">
+          Keyframe Every (minutes, optional):
+          <input
+            type="number"
+            min="1"
+            className="border p-2 w-full"
+            value={keyframeMinutes}
+            onChange={(e) => setKeyframeMinutes(e.target.value)}
+            disabled={changeThreshold === ''}
+            placeholder="e.g. 60"
+          />
+        </label>
 
         <div className="grid grid-cols-4 gap-2 mt-6">
           <button onClick={onClose} className="px-4 py-2 border rounded col-span-1">Cancel</button>
@@ -13,7 +13,11 @@ function EditFeedRegionModal({ feed, onClose, onSave }) {
   const [checkboxDisabled, setCheckboxDisabled] = useState(true);
   const [regionCleared, setRegionCleared] = useState(false);
 
-  const imgUrl = `/static/stills/${feed.uuid}.jpg`;
+  const latestUrl = `/static/stills/${feed.uuid}.jpg`;
+  // While cropping is active the latest still is cropped, so draw on the
+  // uncropped copy the capture task keeps alongside the history.
+  const sourceUrl = `/static/stills/${feed.uuid}/${feed.uuid}.source.jpg`;
+  const [imgUrl, setImgUrl] = useState(feed.crop_active ? sourceUrl : latestUrl);
 
   useEffect(() => {
     const canvas = canvasRef.current;
@@ -190,7 +194,10 @@ function EditFeedRegionModal({ feed, onClose, onSave }) {
             alt="Preview"
             className="hidden"
             onLoad={handleImageLoad}
-            onError={(e) => (e.target.src = '/static/offline.jpg')}
+            onError={(e) => {
+              if (imgUrl === sourceUrl) setImgUrl(latestUrl);
+              else e.target.src = '/static/offline.jpg';
+            }}
           />
         </div>
 
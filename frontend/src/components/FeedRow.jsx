@@ -6,9 +6,13 @@ function FeedRow({ feed, selected, onToggle, onClick }) {
   const dispatchIcon = {
     interval: '🕒',
     schedule: '📅',
+    adaptive: '📈',
     disabled: '🚫',
   };
 
+  // last_capture_at changes when a "captured" event arrives, which reloads the thumbnail.
+  const thumbUrl = `/api/feeds/${feed.uuid}/latest?size=thumb&v=${encodeURIComponent(feed.last_capture_at || '')}`;
+
   return (
     <tr
       className={`border-t hover:bg-blue-50 cursor-pointer ${
@@ -25,10 +29,10 @@ function FeedRow({ feed, selected, onToggle, onClick }) {
       </td>
       <td className="p-2" onClick={(e) => e.stopPropagation()}>
         <img
-          src={`/static/stills/${feed.uuid}.jpg`}
+          src={thumbUrl}
           alt="Thumbnail"
           className="w-24 h-24 object-cover border"
-          data-original-src={`/static/stills/${feed.uuid}.jpg`}
+          data-original-src={thumbUrl}
           onError={(e) => { e.target.src = '/static/offline.jpg'; }}
         />
       </td>
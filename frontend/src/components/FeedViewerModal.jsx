@@ -14,6 +14,7 @@ function FeedViewerModal({ feed, onClose, onEdit }) {
   const dispatchIcon = {
     interval: '🕒 Interval',
     schedule: '📅 Schedule',
+    adaptive: '📈 Adaptive',
     disabled: '🚫 Disabled',
   };
 
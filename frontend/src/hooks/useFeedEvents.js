@@ -0,0 +1,42 @@
+import { useEffect, useRef } from 'react';
+
+// Subscribes to /api/events (Server-Sent Events) and calls the matching
+// handler for each feed event. EventSource reconnects on its own; onReconnect
+// fires after a dropped stream comes back so callers can resync once.
+export function useFeedEvents({ onCaptured, onFeedsChanged, onReconnect }) {
+  const handlers = useRef({});
+  handlers.current = { onCaptured, onFeedsChanged, onReconnect };
+
+  useEffect(() => {
+    const source = new EventSource('/api/events');
+    let dropped = false;
+
+    const parse = (e) => {
+      try {
+        return JSON.parse(e.data);
+      } catch {
+        return null;
+      }
+    };
+
+    source.addEventListener('captured', (e) => {
+      const data = parse(e);
+      if (data && handlers.current.onCaptured) handlers.current.onCaptured(data);
+    });
+
+    ['changed', 'deleted', 'reload'].forEach(name => {
+      source.addEventListener(name, (e) => {
+        const data = parse(e);
+        if (handlers.current.onFeedsChanged) handlers.current.onFeedsChanged(data);
+      });
+    });
+
+    source.onerror = () => { dropped = true; };
+    source.onopen = () => {
+      if (dropped && handlers.current.onReconnect) handlers.current.onReconnect();
+      dropped = false;
+    };
+
+    return () => source.close();
+  }, []);
+}
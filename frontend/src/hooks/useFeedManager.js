@@ -65,8 +65,9 @@ export function useFeedManager() {
     const imgs = document.querySelectorAll("img");
     imgs.forEach(img => {
       const now = Date.now();
-      const originalSrc = img.dataset.originalSrc || img.src;
-      img.src = originalSrc.split("?")[0] + `?refresh=${now}`;
+      const originalSrc = new URL(img.dataset.originalSrc || img.src, window.location.origin);
+      originalSrc.searchParams.set("refresh", now);
+      img.src = originalSrc.pathname + originalSrc.search;
     });
   };
 